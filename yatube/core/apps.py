@@ -3,3 +3,18 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        import atexit
+
+        from django.db.backends.signals import connection_created
+
+        from core.metrics import registry
+        from core.slow_queries import install_slow_query_log
+        from core.sqlite import configure_sqlite
+        from core.timing import install_render_timer
+        install_render_timer()
+        connection_created.connect(install_slow_query_log)
+        connection_created.connect(configure_sqlite)
+        # Наблюдения после последнего сброса не теряются при остановке
+        atexit.register(registry.flush)
@@ -0,0 +1,45 @@
+"""Файловый кеш, общий для процессов одного сервера."""
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class FileCache(FileBasedCache):
+    """FileBasedCache без просмотра каталога при каждой записи.
+
+    FileBasedCache перед каждым set перечисляет все файлы каталога,
+    чтобы сравнить их число с MAX_ENTRIES: при десятках тысяч записей
+    это десятки миллисекунд на запись. Здесь каталог просматривается не
+    чаще раза в CULL_INTERVAL секунд на экземпляр кеша (поток): сначала
+    удаляются просроченные записи, затем, если их все еще больше
+    MAX_ENTRIES, случайная доля, как в FileBasedCache.
+
+    Запись с timeout=0 не сохраняется, а удаляет ключ.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._cull_interval = params.get('OPTIONS', {}).get(
+            'CULL_INTERVAL', 60,
+        )
+        self._next_cull = 0
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout == 0:
+            self.delete(key, version)
+            return
+        super().set(key, value, timeout, version)
+
+    def _cull(self):
+        now = time.monotonic()
+        if now < self._next_cull:
+            return
+        self._next_cull = now + self._cull_interval
+        for fname in self._list_cache_files():
+            try:
+                with open(fname, 'rb') as f:
+                    self._is_expired(f)
+            except FileNotFoundError:
+                pass
+        super()._cull()
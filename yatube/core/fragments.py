@@ -0,0 +1,48 @@
+"""Персональные фрагменты страниц.
+
+Персональная часть страницы (меню пользователя и т.п.) выводится тегом
+{% personal_fragment %} и обрамляется HTML-комментариями. Общая часть
+страницы кешируется одна на всех, а фрагменты отрисовываются заново
+для каждого запроса.
+"""
+import re
+
+from django.template.loader import render_to_string
+
+FRAGMENT_START = '<!--personal:{}-->'
+FRAGMENT_END = '<!--/personal-->'
+FRAGMENT_RE = re.compile(
+    r'<!--personal:(?P<template>[\w./-]+)-->.*?<!--/personal-->',
+    re.DOTALL,
+)
+
+
+def wrap_fragment(template_name, html):
+    return FRAGMENT_START.format(template_name) + html + FRAGMENT_END
+
+
+def split_fragments(content):
+    """Разбивает страницу на общие куски и имена шаблонов фрагментов.
+
+    Нечетные элементы результата — имена шаблонов фрагментов.
+    """
+    parts = []
+    position = 0
+    for match in FRAGMENT_RE.finditer(content):
+        parts.append(content[position:match.start()])
+        parts.append(match.group('template'))
+        position = match.end()
+    parts.append(content[position:])
+    return parts
+
+
+def render_fragments(parts, request):
+    """Собирает страницу, отрисовывая фрагменты для текущего запроса."""
+    rendered = []
+    for index, part in enumerate(parts):
+        if index % 2:
+            part = wrap_fragment(
+                part, render_to_string(part, request=request),
+            )
+        rendered.append(part)
+    return ''.join(rendered)
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import clear_slow_queries, worst_queries
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает медленные запросы к базе с наибольшим суммарным '
+        'временем: форму запроса, источник и план выполнения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Сколько форм запросов показать.',
+        )
+        parser.add_argument(
+            '--origin',
+            help='Только запросы одного источника (posts:index, '
+                 '"manage.py seed").',
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Очистить журнал медленных запросов.',
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear_slow_queries()
+            self.stdout.write('Журнал медленных запросов очищен')
+            return
+        rows = worst_queries(options['limit'], options['origin'])
+        if not rows:
+            self.stdout.write('Медленных запросов нет')
+            return
+        for number, row in enumerate(rows, 1):
+            sql, origin, params, plan, calls, total_ms, max_ms = row
+            self.stdout.write(
+                f'{number}. {origin}: {calls} раз, всего {total_ms:.1f} мс, '
+                f'в среднем {total_ms / calls:.1f} мс, '
+                f'максимум {max_ms:.1f} мс'
+            )
+            self.stdout.write(f'   {sql}')
+            self.stdout.write(f'   параметры: {params}')
+            if plan:
+                for line in plan.splitlines():
+                    self.stdout.write(f'   план: {line}')
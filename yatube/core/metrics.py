@@ -0,0 +1,140 @@
+"""Гистограммы времени ответа, запросов к базе и размера ответа по view.
+
+Каждый процесс копит наблюдения в памяти и раз в METRICS_FLUSH_INTERVAL
+секунд прибавляет их к общему файлу SQLite (METRICS_DB), поэтому
+метрики всех рабочих процессов складываются, а запрос не ждет записи
+на диск. Эндпоинт отдает сумму в формате Prometheus.
+"""
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+PREFIX = 'yatube'
+HISTOGRAMS = {
+    'request_duration_seconds': (
+        'Время обработки запроса, с.',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'request_queries': (
+        'Количество запросов к базе данных за запрос.',
+        (1, 2, 3, 5, 10, 20, 50, 100),
+    ),
+    'response_size_bytes': (
+        'Размер ответа, байт.',
+        (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000),
+    ),
+}
+CREATE_TABLE_SQL = (
+    'CREATE TABLE IF NOT EXISTS histogram ('
+    'metric TEXT, view TEXT, bucket TEXT, value REAL, '
+    'PRIMARY KEY (metric, view, bucket))'
+)
+UPSERT_SQL = (
+    'INSERT INTO histogram (metric, view, bucket, value) '
+    'VALUES (?, ?, ?, ?) '
+    'ON CONFLICT (metric, view, bucket) '
+    'DO UPDATE SET value = value + excluded.value'
+)
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=5)
+    connection.execute(CREATE_TABLE_SQL)
+    return connection
+
+
+class MetricsRegistry:
+    """Наблюдения текущего процесса, еще не записанные в общий файл.
+
+    Для каждой гистограммы хранится количество наблюдений в каждом
+    интервале (не накопленное), их сумма и общее количество.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = defaultdict(float)
+        self.last_flush = time.monotonic()
+
+    def observe(self, metric, view, value):
+        buckets = HISTOGRAMS[metric][1]
+        # Интервал с верхней границей le >= value; len(buckets) — +Inf
+        index = bisect_left(buckets, value)
+        with self.lock:
+            self.pending[metric, view, str(index)] += 1
+            self.pending[metric, view, 'sum'] += value
+            self.pending[metric, view, 'count'] += 1
+
+    def flush(self):
+        """Прибавляет накопленное к общему файлу одной транзакцией."""
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(float)
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+        connection = connect(settings.METRICS_DB)
+        try:
+            with connection:
+                connection.executemany(UPSERT_SQL, [
+                    (*key, value) for key, value in pending.items()
+                ])
+        finally:
+            connection.close()
+
+    def flush_if_due(self):
+        if time.monotonic() - self.last_flush >= (
+            settings.METRICS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+
+registry = MetricsRegistry()
+
+
+def read_histograms():
+    """Суммы всех процессов: {(metric, view): {bucket: value}}."""
+    connection = connect(settings.METRICS_DB)
+    try:
+        rows = connection.execute(
+            'SELECT metric, view, bucket, value FROM histogram'
+        ).fetchall()
+    finally:
+        connection.close()
+    histograms = defaultdict(dict)
+    for metric, view, bucket, value in rows:
+        histograms[metric, view][bucket] = value
+    return histograms
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render_exposition(histograms):
+    """Текстовый формат Prometheus с накопленными интервалами."""
+    lines = []
+    for metric, (description, buckets) in HISTOGRAMS.items():
+        name = f'{PREFIX}_{metric}'
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+        views = sorted(view for key, view in histograms if key == metric)
+        for view in views:
+            values = histograms[metric, view]
+            label = f'view="{view}"'
+            cumulative = 0
+            for index, bound in enumerate((*buckets, '+Inf')):
+                cumulative += values.get(str(index), 0)
+                lines.append(
+                    f'{name}_bucket{{{label},le="{bound}"}} '
+                    f'{format_value(cumulative)}'
+                )
+            lines.append(
+                f'{name}_sum{{{label}}} {format_value(values.get("sum", 0))}'
+            )
+            lines.append(
+                f'{name}_count{{{label}}} '
+                f'{format_value(values.get("count", 0))}'
+            )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,221 @@
+import json
+import logging
+import os
+import random
+import time
+
+from django.conf import settings
+
+from core.metrics import registry
+from core.profiling import MODES, profile
+from core.queries import RepeatedQueries, track_queries, wrap_connections
+from core.routers import STICKY_COOKIE, routing
+from core.slow_queries import query_origin
+from core.timing import track_render_time
+
+logger = logging.getLogger('core.queries')
+timing_logger = logging.getLogger('core.timing')
+
+
+class NPlusOneDetected(Exception):
+    """Один и тот же запрос выполнен много раз из одного места."""
+
+
+class NPlusOneMiddleware:
+    """Поиск N+1 запросов на доле NPLUSONE_SAMPLE_RATE запросов.
+
+    Для выбранных запросов SQL группируется по форме и месту вызова
+    (строка шаблона или кода проекта); форма, повторенная не меньше
+    NPLUSONE_THRESHOLD раз, записывается в лог core.queries, а при
+    NPLUSONE_RAISE (в тестах) вызывает NPlusOneDetected. Остальные
+    запросы проходят без обертки. Запросы при отдаче потоковых
+    ответов не учитываются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.NPLUSONE_SAMPLE_RATE:
+            return self.get_response(request)
+        queries = RepeatedQueries()
+        with wrap_connections(queries):
+            response = self.get_response(request)
+        repeated = queries.repeated(settings.NPLUSONE_THRESHOLD)
+        if repeated:
+            report = '\n'.join(
+                f'{count} x {sql} ({site})' for sql, site, count in repeated
+            )
+            message = f'N+1 запросов на {request.get_full_path()}:\n{report}'
+            if settings.NPLUSONE_RAISE:
+                raise NPlusOneDetected(message)
+            logger.warning(message)
+        return response
+
+
+class ServerTimingMiddleware:
+    """Время обработки запроса по частям.
+
+    Считает запросы ко всем базам и их время (wrap_connections),
+    время отрисовки шаблонов и время от вызова view-функции до ответа.
+    Сотрудникам метрики отдаются в заголовке Server-Timing, для всех
+    запросов пишутся строкой JSON в лог core.timing (уровень INFO).
+    Стоит подключать первым, чтобы total включал все middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        request.view_started = None
+        with track_queries() as db, track_render_time() as templates:
+            response = self.get_response(request)
+        finished = time.perf_counter()
+        metrics = {
+            'db': db['sql_ms'],
+            'tpl': templates['render_ms'],
+            'view': (
+                (finished - request.view_started) * 1000
+                if request.view_started is not None else 0.0
+            ),
+            'total': (finished - started) * 1000,
+        }
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration:.3f}'
+                for name, duration in metrics.items()
+            ) + f', queries;desc="{db["queries"]}"'
+        if timing_logger.isEnabledFor(logging.INFO):
+            timing_logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': db['queries'],
+                **{
+                    f'{name}_ms': round(duration, 3)
+                    for name, duration in metrics.items()
+                },
+            }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_started = time.perf_counter()
+
+
+class MetricsMiddleware:
+    """Гистограммы времени, запросов к базе и размера ответа по view.
+
+    Наблюдения копятся в памяти процесса (core.metrics.registry) и раз
+    в METRICS_FLUSH_INTERVAL секунд прибавляются к общему файлу
+    METRICS_DB. Запросы, не дошедшие до view, попадают в 'unmatched';
+    размер потоковых ответов не учитывается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with track_queries() as db:
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None else 'unmatched'
+        registry.observe('request_duration_seconds', view, duration)
+        registry.observe('request_queries', view, db['queries'])
+        if not response.streaming:
+            registry.observe(
+                'response_size_bytes', view, len(response.content),
+            )
+        registry.flush_if_due()
+        return response
+
+
+class ProfilerMiddleware:
+    """Профилирование запроса по параметру ?profile= или заголовку
+    X-Profile со значением cprofile или sample.
+
+    Доступно только сотрудникам; профиль сохраняется в PROFILER_DIR,
+    путь к нему отдается в заголовке X-Profile. Флаг проверяется до
+    обращения к request.user, поэтому обычные запросы не загружают
+    ни сессию, ни пользователя. Подключается после
+    AuthenticationMiddleware, так что в профиль попадают остальные
+    middleware, view-функция и отрисовка шаблона.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.GET.get('profile') or request.META.get(
+            'HTTP_X_PROFILE'
+        )
+        if not mode or not request.user.is_staff:
+            return self.get_response(request)
+        if mode not in MODES:
+            mode = MODES[0]
+        with profile(mode) as save:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None else 'unmatched'
+        response['X-Profile'] = os.path.relpath(
+            save(view), settings.PROFILER_DIR,
+        )
+        return response
+
+
+class QueryOriginMiddleware:
+    """Запоминает view запроса как источник медленных запросов.
+
+    Запросы до выбора view (middleware, 404) записываются под
+    источником процесса.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = query_origin.set(query_origin.get())
+        try:
+            return self.get_response(request)
+        finally:
+            query_origin.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        query_origin.set(request.resolver_match.view_name)
+
+
+class ReplicaRoutingMiddleware:
+    """Разрешает чтение с реплик безопасным запросам без метки записи
+    и ставит метку STICKY_COOKIE после запросов, писавших в базу.
+
+    Подключается до SessionMiddleware, чтобы запись сессии тоже
+    ставила метку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {
+            'replica': (
+                request.method in ('GET', 'HEAD')
+                and STICKY_COOKIE not in request.COOKIES
+            ),
+            'wrote': False,
+        }
+        token = routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.reset(token)
+        if state['wrote']:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,88 @@
+"""Профилирование отдельных запросов по требованию сотрудника.
+
+cProfile сохраняет статистику pstats (.prof), которую можно открыть
+в pstats, snakeviz или gprof2dot. Выборочный профилировщик раз в
+PROFILER_SAMPLE_INTERVAL секунд снимает стек потока запроса и сохраняет
+свернутые стеки (.collapsed) — вход flamegraph.pl и speedscope; он
+почти не искажает время, но не считает вызовы.
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils import timezone
+
+MODES = ('cprofile', 'sample')
+
+
+class StackSampler(threading.Thread):
+    """Фоновый поток, собирающий стеки заданного потока."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                module = os.path.splitext(
+                    os.path.basename(code.co_filename)
+                )[0]
+                stack.append(f'{module}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def profile_path(view_name, extension):
+    """Файл профиля: имя view и время запроса."""
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S-%f')
+    name = view_name.replace(':', '-')
+    return os.path.join(settings.PROFILER_DIR, f'{name}-{stamp}.{extension}')
+
+
+@contextmanager
+def profile(mode):
+    """Профилирует блок кода и отдает функцию save(view_name), которая
+    записывает профиль и возвращает путь к файлу."""
+    if mode == 'sample':
+        sampler = StackSampler(
+            threading.get_ident(), settings.PROFILER_SAMPLE_INTERVAL,
+        )
+        start, stop = sampler.start, sampler.stop
+
+        def save(view_name):
+            path = profile_path(view_name, 'collapsed')
+            with open(path, 'w') as collapsed:
+                for stack, count in sampler.stacks.most_common():
+                    collapsed.write(f'{stack} {count}\n')
+            return path
+    else:
+        profiler = cProfile.Profile(time.perf_counter)
+        start, stop = profiler.enable, profiler.disable
+
+        def save(view_name):
+            path = profile_path(view_name, 'prof')
+            profiler.dump_stats(path)
+            return path
+    start()
+    try:
+        yield save
+    finally:
+        stop()
@@ -0,0 +1,113 @@
+"""Учет запросов к базе данных внутри участка кода."""
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+# Списки IN (%s, %s, ...) разной длины — один и тот же запрос
+IN_LIST_RE = re.compile(r'\((?:%s, )+%s\)')
+# Управление транзакцией: BEGIN, SAVEPOINT, RELEASE и ROLLBACK
+TRANSACTION_RE = re.compile(
+    r'\s*(?:BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE,
+)
+# Модули оберток запросов: call_site ищет место вызова за их пределами
+WRAPPER_FILES = {__file__}
+
+
+@contextmanager
+def wrap_connections(wrapper):
+    """connection.execute_wrapper сразу для всех баз из DATABASES.
+
+    Чтение, которое роутер отправил на реплику, учитывается так же,
+    как запрос к основной базе.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
+
+
+@contextmanager
+def track_queries():
+    """Считает запросы к базе и их суммарное время в миллисекундах.
+
+    CaptureQueriesContext округляет время запроса до миллисекунды
+    и работает только с отладочным курсором, поэтому запросы
+    замеряются собственной оберткой. Команды управления транзакцией
+    (BEGIN в SQLite и точки сохранения atomic) запросами не считаются:
+    их число зависит от того, выполняется ли код внутри внешней
+    транзакции, а не от самого кода; их время учитывается.
+    """
+    stats = {'queries': 0, 'sql_ms': 0.0}
+
+    def wrapper(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not TRANSACTION_RE.match(sql):
+                stats['queries'] += 1
+            stats['sql_ms'] += (time.perf_counter() - started) * 1000
+
+    with wrap_connections(wrapper):
+        yield stats
+
+
+def fingerprint(sql):
+    """Форма запроса: SQL без значений параметров."""
+    return IN_LIST_RE.sub('(%s, ...)', sql)
+
+
+def call_site():
+    """Место в проекте, откуда выполняется запрос.
+
+    Строка шаблона (по узлу, который отрисовывался) и ближайшая к
+    запросу строка кода проекта; код Django и библиотек пропускается.
+    """
+    base_dir = str(settings.BASE_DIR)
+    code = template = None
+    frame = sys._getframe(1)
+    while frame is not None and template is None:
+        node = frame.f_locals.get('self')
+        # type(), а не isinstance(): isinstance вычисляет ленивые объекты
+        if issubclass(type(node), Node) and getattr(node, 'token', None):
+            template = f'{node.origin.template_name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if (
+            code is None
+            and filename.startswith(base_dir)
+            and filename not in WRAPPER_FILES
+            and 'site-packages' not in filename
+        ):
+            path = os.path.relpath(filename, base_dir)
+            code = f'{path}:{frame.f_lineno}'
+        frame = frame.f_back
+    return ' в '.join(site for site in (code, template) if site) or '?'
+
+
+class RepeatedQueries:
+    """Запросы одной формы из одного места, собранные за запрос.
+
+    Подключается через wrap_connections; повтор одного и того
+    же запроса из одного места (обычно в цикле) — признак N+1.
+    """
+
+    def __init__(self):
+        self.sites = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.sites[fingerprint(sql), call_site()] += 1
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        return [
+            (sql, site, count)
+            for (sql, site), count in self.sites.most_common()
+            if count >= threshold
+        ]
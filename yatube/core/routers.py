@@ -0,0 +1,68 @@
+"""Чтение с реплик базы данных.
+
+Реплики перечисляются в DATABASE_REPLICAS. Читают с них только
+безопасные запросы (GET, HEAD) посетителей, которые недавно ничего не
+записывали; запись, чтение в том же запросе после записи и все, что
+выполняется вне запросов (команды manage.py), идет в основную базу.
+После записи посетитель получает cookie STICKY_COOKIE на
+REPLICA_STICKY_SECONDS секунд, поэтому страница после редиректа
+читается из основной базы, даже если реплика отстает.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = 'primary_pin'
+
+# Состояние запроса: {'replica': можно ли читать с реплики,
+# 'wrote': была ли запись}; None — вне запроса
+routing = ContextVar('routing', default=None)
+
+
+def reads_from_replica():
+    """Читает ли текущий запрос с реплики.
+
+    Прочитанное с реплики может отставать от основной базы, поэтому
+    в общий кеш оно не сохраняется.
+    """
+    state = routing.get()
+    return bool(
+        state is not None and state['replica']
+        and settings.DATABASE_REPLICAS
+    )
+
+
+def read_from_primary():
+    """Дальнейшее чтение текущего запроса — из основной базы."""
+    state = routing.get()
+    if state is not None:
+        state['replica'] = False
+
+
+class ReplicaRouter:
+    """Роутер: запись в основную базу, чтение — по состоянию запроса."""
+
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if state is None or not state['replica'] or (
+            not settings.DATABASE_REPLICAS
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is not None:
+            # Чтение после записи в том же запросе — из основной базы
+            state['replica'] = False
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными
+        return db not in settings.DATABASE_REPLICAS
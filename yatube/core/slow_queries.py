@@ -0,0 +1,172 @@
+"""Журнал медленных запросов к базе данных.
+
+Обертка выполнения запросов подключается к каждому соединению
+(сигнал connection_created) и замечает запросы дольше SLOW_QUERY_MS.
+Такой запрос прибавляется к сводке по форме и источнику (view или
+команда manage.py) в файле METRICS_DB. Раз в SLOW_QUERY_RATE_LIMIT
+секунд для каждой формы дополнительно снимается EXPLAIN QUERY PLAN и
+пишется запись в лог core.slow_queries; отчет строит команда
+slow_queries.
+"""
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from itertools import groupby
+
+from django.conf import settings
+from django.db.backends.sqlite3.base import FORMAT_QMARK_REGEX
+
+from core.queries import WRAPPER_FILES, fingerprint
+
+logger = logging.getLogger('core.slow_queries')
+WRAPPER_FILES.add(__file__)
+
+
+def process_origin():
+    """Источник запросов вне view-функций: команда manage.py."""
+    if len(sys.argv) > 1 and sys.argv[0].endswith('manage.py'):
+        return f'manage.py {sys.argv[1]}'
+    return 'unknown'
+
+
+query_origin = ContextVar('query_origin', default=process_origin())
+
+CREATE_TABLE_SQL = (
+    'CREATE TABLE IF NOT EXISTS slow_query ('
+    'fingerprint TEXT, origin TEXT, params TEXT, plan TEXT, '
+    'calls INTEGER, total_ms REAL, max_ms REAL, last_seen REAL, '
+    'PRIMARY KEY (fingerprint, origin))'
+)
+UPSERT_SQL = (
+    'INSERT INTO slow_query VALUES (?, ?, ?, ?, 1, ?, ?, ?) '
+    'ON CONFLICT (fingerprint, origin) DO UPDATE SET '
+    'params = excluded.params, '
+    'plan = coalesce(excluded.plan, plan), '
+    'calls = calls + 1, '
+    'total_ms = total_ms + excluded.total_ms, '
+    'max_ms = max(max_ms, excluded.max_ms), '
+    'last_seen = excluded.last_seen'
+)
+
+explained_at = {}
+explained_lock = threading.Lock()
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=5)
+    connection.execute(CREATE_TABLE_SQL)
+    return connection
+
+
+def params_shape(params):
+    """Типы параметров без значений; повторы сворачиваются:
+    (int, str x 3)."""
+    if params is None:
+        return '()'
+    if isinstance(params, dict):
+        params = params.values()
+    shape = []
+    for name, group in groupby(type(param).__name__ for param in params):
+        count = len(list(group))
+        shape.append(f'{name} x {count}' if count > 1 else name)
+    return f'({", ".join(shape)})'
+
+
+def explain(connection, sql, params):
+    """План запроса SELECT в SQLite через соединение DB-API,
+    минуя обертки Django."""
+    if connection.vendor != 'sqlite':
+        return None
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    query = FORMAT_QMARK_REGEX.sub('?', sql).replace('%%', '%')
+    try:
+        rows = connection.connection.execute(
+            f'EXPLAIN QUERY PLAN {query}', params or (),
+        ).fetchall()
+    except sqlite3.Error as error:
+        return f'EXPLAIN не выполнен: {error}'
+    return '\n'.join(row[-1] for row in rows)
+
+
+def due_for_explain(form):
+    """Ограничение частоты EXPLAIN и записей в лог для одной формы."""
+    now = time.monotonic()
+    with explained_lock:
+        last = explained_at.get(form)
+        if last is not None and now - last < settings.SLOW_QUERY_RATE_LIMIT:
+            return False
+        explained_at[form] = now
+        return True
+
+
+def log_slow_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= settings.SLOW_QUERY_MS:
+            record_slow_query(
+                context['connection'], sql, params, many, duration,
+            )
+
+
+def record_slow_query(connection, sql, params, many, duration):
+    form = fingerprint(sql)
+    origin = query_origin.get()
+    shape = 'executemany' if many else params_shape(params)
+    plan = None
+    if due_for_explain(form):
+        plan = None if many else explain(connection, sql, params)
+        logger.warning(json.dumps({
+            'sql': form,
+            'params': shape,
+            'duration_ms': round(duration, 3),
+            'origin': origin,
+            'plan': plan,
+        }, ensure_ascii=False))
+    store = connect(settings.METRICS_DB)
+    try:
+        with store:
+            store.execute(UPSERT_SQL, (
+                form, origin, shape, plan, duration, duration, time.time(),
+            ))
+    finally:
+        store.close()
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    """Обработчик connection_created: подключает журнал к соединению."""
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_query)
+
+
+def worst_queries(limit, origin=None):
+    """Формы запросов с наибольшим суммарным временем."""
+    store = connect(settings.METRICS_DB)
+    try:
+        return store.execute(
+            'SELECT fingerprint, origin, params, plan, calls, total_ms, '
+            'max_ms FROM slow_query '
+            'WHERE ? IS NULL OR origin = ? '
+            'ORDER BY total_ms DESC LIMIT ?',
+            (origin, origin, limit),
+        ).fetchall()
+    finally:
+        store.close()
+
+
+def clear_slow_queries():
+    store = connect(settings.METRICS_DB)
+    try:
+        with store:
+            store.execute('DELETE FROM slow_query')
+    finally:
+        store.close()
+    with explained_lock:
+        explained_at.clear()
@@ -0,0 +1,67 @@
+"""Настройка SQLite для одновременной работы многих запросов.
+
+В режиме WAL читатели не ждут писателя, но писатель в базе всегда
+один: конкурирующая запись ждет busy_timeout и затем получает
+"database is locked". Поэтому запись внутри процесса выстраивается
+в очередь на блокировке, а оставшиеся конфликты с другими процессами
+повторяются несколько раз с растущей паузой.
+"""
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+LOCKED_MESSAGES = ('database is locked', 'database table is locked')
+
+write_lock = threading.RLock()
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик connection_created: PRAGMA из SQLITE_PRAGMAS.
+
+    PRAGMA выполняются через соединение DB-API, поэтому не попадают
+    в счетчики запросов view-функций.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return any(message in str(error) for message in LOCKED_MESSAGES)
+
+
+def write_with_retries(func, *args, **kwargs):
+    """Выполняет func в транзакции, по одной записи на процесс.
+
+    При "database is locked" транзакция повторяется до
+    SQLITE_WRITE_RETRIES раз. Внутри внешней транзакции повтор
+    невозможен, и func просто выполняется в ней.
+    """
+    if connection.in_atomic_block:
+        return func(*args, **kwargs)
+    delay = settings.SQLITE_RETRY_DELAY
+    for attempt in range(settings.SQLITE_WRITE_RETRIES + 1):
+        try:
+            with write_lock, transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if not is_locked(error) or (
+                attempt == settings.SQLITE_WRITE_RETRIES
+            ):
+                raise
+        time.sleep(delay)
+        delay *= 2
+
+
+def serialize_writes(view_func):
+    """Декоратор view-функции: POST выполняется через write_with_retries."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return view_func(request, *args, **kwargs)
+        return write_with_retries(view_func, request, *args, **kwargs)
+    return wrapper
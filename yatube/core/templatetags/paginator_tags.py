@@ -0,0 +1,63 @@
+from django import template
+from django.http import QueryDict
+
+register = template.Library()
+
+ELLIPSIS = None
+PAGE_PARAMS = ('page', 'cursor')
+
+
+def elided_page_range(number, num_pages, on_each_side=2, on_ends=1):
+    """Номера страниц вокруг текущей и по краям, пропуски — ELLIPSIS.
+
+    Длина результата не зависит от количества страниц.
+    """
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    pages = []
+    if number > on_ends + on_each_side + 2:
+        pages.extend(range(1, on_ends + 1))
+        pages.append(ELLIPSIS)
+        pages.extend(range(number - on_each_side, number + 1))
+    else:
+        pages.extend(range(1, number + 1))
+    if number < num_pages - on_each_side - on_ends - 1:
+        pages.extend(range(number + 1, number + on_each_side + 1))
+        pages.append(ELLIPSIS)
+        pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages.extend(range(number + 1, num_pages + 1))
+    return pages
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, name, value=None):
+    """Query string текущего запроса с замененным параметром страницы.
+
+    Остальные параметры (например, поисковый запрос) сохраняются,
+    параметры другого режима пагинации отбрасываются.
+    """
+    request = context.get('request')
+    params = request.GET.copy() if request is not None else QueryDict(
+        mutable=True,
+    )
+    for page_param in PAGE_PARAMS:
+        params.pop(page_param, None)
+    if value is not None:
+        params[name] = value
+    return f'?{params.urlencode()}'
+
+
+@register.inclusion_tag('includes/page_window.html', takes_context=True)
+def page_window(context, page_obj, on_each_side=2, on_ends=1):
+    """Окно ссылок на страницы: первая, последняя и соседние с текущей."""
+    return {
+        'request': context.get('request'),
+        'page_obj': page_obj,
+        'pages': elided_page_range(
+            page_obj.number,
+            page_obj.paginator.num_pages,
+            on_each_side,
+            on_ends,
+        ),
+    }
@@ -0,0 +1,13 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.fragments import wrap_fragment
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def personal_fragment(context, template_name):
+    """Отрисовывает персональный фрагмент с метками для кеша страниц."""
+    fragment = context.template.engine.get_template(template_name)
+    return mark_safe(wrap_fragment(template_name, fragment.render(context)))
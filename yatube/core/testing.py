@@ -0,0 +1,52 @@
+"""Запуск тестов без записи во временные файлы проекта.
+
+Общий файловый кеш и файл метрик переносятся во временный каталог:
+тесты работают с теми же бэкендами, что и сайт, но не трогают его
+данные.
+"""
+import logging
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from core.metrics import registry
+
+
+@contextmanager
+def isolated_files():
+    with tempfile.TemporaryDirectory() as directory:
+        caches = {
+            alias: {**config, 'LOCATION': f'{directory}/cache-{alias}'}
+            for alias, config in settings.CACHES.items()
+        }
+        with override_settings(
+            CACHES=caches,
+            METRICS_DB=f'{directory}/metrics.sqlite3',
+        ):
+            yield
+            # Иначе остаток наблюдений запишет в METRICS_DB atexit
+            registry.flush()
+
+
+class IsolatedTestRunner(DiscoverRunner):
+    """Тестовый раннер manage.py test с файлами во временном каталоге.
+
+    Строки core.timing о каждом запросе в выводе тестов не пишутся;
+    тесты журнала включают их через assertLogs.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.isolated_files = isolated_files()
+        self.isolated_files.__enter__()
+        self.timing_logger = logging.getLogger('core.timing')
+        self.timing_level = self.timing_logger.level
+        self.timing_logger.setLevel(logging.WARNING)
+
+    def teardown_test_environment(self, **kwargs):
+        self.timing_logger.setLevel(self.timing_level)
+        self.isolated_files.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
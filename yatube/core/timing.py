@@ -0,0 +1,54 @@
+"""Замер времени отрисовки шаблонов в пределах запроса."""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.base import Template
+
+render_timings = ContextVar('render_timings', default=None)
+
+
+def install_render_timer():
+    """Оборачивает Template.render один раз при запуске проекта.
+
+    Время учитывается, только пока действует track_render_time;
+    в остальное время обертка стоит одно обращение к ContextVar.
+    """
+    if getattr(Template.render, 'timed', False):
+        return
+    original_render = Template.render
+
+    def render(template, context):
+        timings = render_timings.get()
+        if timings is None:
+            return original_render(template, context)
+        timings['depth'] += 1
+        started = time.perf_counter()
+        try:
+            return original_render(template, context)
+        finally:
+            timings['depth'] -= 1
+            # include и extends отрисовываются внутри внешнего шаблона
+            if not timings['depth']:
+                timings['render_ms'] += (time.perf_counter() - started) * 1000
+
+    render.timed = True
+    Template.render = render
+
+
+@contextmanager
+def track_render_time():
+    """Суммирует время отрисовки шаблонов в миллисекундах.
+
+    Ленивые запросы, выполненные при отрисовке, входят в это время.
+    Вложенный замер добавляет свое время к внешнему.
+    """
+    outer = render_timings.get()
+    timings = {'render_ms': 0.0, 'depth': 0}
+    token = render_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        render_timings.reset(token)
+        if outer is not None and not outer['depth']:
+            outer['render_ms'] += timings['render_ms']
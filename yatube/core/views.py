@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from core.metrics import read_histograms, registry, render_exposition
+
+EXPOSITION_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def has_metrics_token(request):
+    """Запрос сборщика с токеном METRICS_TOKEN в Authorization.
+
+    Адрес клиента не проверяется: за обратным прокси у всех запросов
+    REMOTE_ADDR — адрес прокси.
+    """
+    if not settings.METRICS_TOKEN:
+        return False
+    return constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''),
+        f'Bearer {settings.METRICS_TOKEN}',
+    )
+
+
+def metrics(request):
+    """Гистограммы всех рабочих процессов в формате Prometheus.
+
+    Доступны сотрудникам и сборщику с токеном METRICS_TOKEN.
+    """
+    if not (request.user.is_staff or has_metrics_token(request)):
+        raise PermissionDenied
+    registry.flush()
+    return HttpResponse(
+        render_exposition(read_histograms()),
+        content_type=EXPOSITION_CONTENT_TYPE,
+    )
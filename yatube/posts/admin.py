@@ -1,15 +1,116 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ALL_VAR, ORDER_VAR, ChangeList
 
-from .models import Group, Post
+from .cache import count_key
+from .models import Follow, Group, GroupFollow, Post
+from .search import search_posts
+from .utils import EstimatedCountPaginator, KeysetPaginator
+
+CURSOR_VAR = 'cursor'
+
+
+class PostChangeList(ChangeList):
+    """Список постов с курсорной навигацией.
+
+    При сортировке по умолчанию (-pub_date, -id) страница выбирается
+    по курсору: сначала ключи страницы по индексу, затем сами посты
+    по первичному ключу. Глубокие страницы стоят столько же, сколько
+    первая. При сортировке по столбцу используется обычная пагинация.
+    """
+
+    keyset_page = None
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.keyset = (
+            ORDER_VAR not in request.GET and ALL_VAR not in request.GET
+        )
+        super().__init__(request, *args, **kwargs)
+        self.params.pop(CURSOR_VAR, None)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.count_estimated = self.paginator.estimated
+        if not self.keyset:
+            return
+        keys = self.queryset.select_related(None).only('id', 'pub_date')
+        page = KeysetPaginator(keys, self.list_per_page).get_page(
+            self.cursor,
+        )
+        self.result_list = self.queryset.filter(
+            pk__in=[post.pk for post in page],
+        ).order_by(*KeysetPaginator.ordering)
+        self.can_show_all = False
+        self.multi_page = page.has_previous() or page.has_next()
+        self.keyset_page = page
+        self.keyset_links = []
+        if page.has_previous():
+            self.keyset_links += [
+                ('« Первая', self.get_query_string(remove=[CURSOR_VAR])),
+                ('‹ Предыдущая', self.cursor_url(page.previous_cursor)),
+            ]
+        if page.has_next():
+            self.keyset_links += [
+                ('Следующая ›', self.cursor_url(page.next_cursor)),
+                ('Последняя »', self.cursor_url(page.last_cursor)),
+            ]
+
+    def cursor_url(self, cursor):
+        return self.get_query_string({CURSOR_VAR: cursor})
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    # Полное количество постов без фильтров — лишний COUNT(*)
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return PostChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        # Количество без фильтров поддерживается сигналами в кеше
+        key = None if queryset.query.has_filters() else count_key()
+        return EstimatedCountPaginator(
+            queryset,
+            per_page,
+            key,
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+        )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name == 'group':
+            # Варианты выбираются одним запросом на весь список,
+            # а не отдельным запросом в каждой строке формы.
+            choices = getattr(request, 'group_choices', None)
+            if choices is None:
+                choices = [choice for choice in formfield.choices]
+                request.group_choices = choices
+            formfield.choices = choices
+        return formfield
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту через полнотекстовый индекс."""
+        if not search_term:
+            return queryset, False
+        return search_posts(search_term, queryset), False
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
+admin.site.register(Follow)
+admin.site.register(GroupFollow)
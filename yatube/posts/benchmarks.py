@@ -0,0 +1,110 @@
+"""Общие инструменты для команд замера производительности."""
+import math
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+from core.queries import track_queries
+from core.timing import track_render_time
+from posts.dataset import DatasetGenerator
+
+
+@contextmanager
+def benchmark_database(name=None):
+    """Создает временную базу данных, как при запуске тестов.
+
+    Замеры не трогают рабочую базу и не зависят от ее содержимого.
+    По умолчанию база SQLite находится в памяти; name задает файл,
+    который нужен для замеров из нескольких потоков.
+    """
+    old_name = connection.settings_dict['NAME']
+    old_test = connection.settings_dict['TEST']
+    if name is not None:
+        connection.settings_dict['TEST'] = {**old_test, 'NAME': name}
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False,
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        connection.settings_dict['TEST'] = old_test
+
+
+def seed(posts, authors=100, groups=20, batch_size=10_000, make_text=None):
+    """Наполняет базу равномерно распределенными постами.
+
+    make_text(number) возвращает текст поста; по умолчанию текст шаблонный.
+    """
+    generator = DatasetGenerator(
+        seed=0, make_text=make_text or 'Тестовое сообщение {}'.format,
+    )
+    author_ids = generator.create_users(authors, batch_size)
+    group_ids = generator.create_groups(groups)
+    generator.create_posts(
+        posts,
+        author_ids,
+        group_ids,
+        batch_size,
+        no_group_share=1 / (groups + 1),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def measure(func, repeat):
+    """Выполняет func repeat раз и возвращает p50 и p95 в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[math.ceil(len(timings) * 0.95) - 1], 3),
+    }
+
+
+def profile_request(request, repeat):
+    """Задержка request() и его запросы к базе и время отрисовки.
+
+    Задержка измеряется без перехвата запросов; количество запросов,
+    их время и время отрисовки — отдельным, последним вызовом.
+    """
+    result = measure(request, repeat)
+    with track_queries() as stats, track_render_time() as timings:
+        request()
+    result.update(
+        queries=stats['queries'],
+        sql_ms=round(stats['sql_ms'], 3),
+        render_ms=round(timings['render_ms'], 3),
+    )
+    return result
+
+
+def compare_reports(report, baseline, tolerance):
+    """Регрессии отчета относительно базового.
+
+    Регрессия — рост p95 больше чем на долю tolerance или рост
+    количества запросов к базе.
+    """
+    regressions = []
+    for size, views in report.items():
+        for view, result in views.items():
+            base = baseline.get(size, {}).get(view)
+            if base is None:
+                continue
+            if result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f'{size}:{view}: p95 {base["p95_ms"]} -> '
+                    f'{result["p95_ms"]} ms'
+                )
+            if result['queries'] > base['queries']:
+                regressions.append(
+                    f'{size}:{view}: запросов {base["queries"]} -> '
+                    f'{result["queries"]}'
+                )
+    return regressions
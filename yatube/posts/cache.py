@@ -0,0 +1,134 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.routers import reads_from_replica
+from posts.models import FeedCounter
+
+COUNT_KEY_PREFIX = 'posts:count'
+TAG_KEY_PREFIX = 'posts:tag'
+# Тег всех лент: сбрасывается, когда меняется то, что видно во всех лентах
+ALL_FEEDS_TAG = 'feed:all'
+
+
+def count_key(group=None, author=None):
+    """Ключ количества постов ленты — тег ленты."""
+    return feed_tag(
+        group_id=None if group is None else group.pk,
+        author_id=None if author is None else author.pk,
+    )
+
+
+def get_count(tag):
+    """Количество постов ленты из счетчика FeedCounter.
+
+    Значение кешируется под текущей версией тега ленты: сброс тега
+    после записи делает его устаревшим, и следующий запрос один раз
+    читает счетчик из базы. Счетчик, прочитанный с реплики, может
+    отставать и не кешируется.
+    """
+    version, = get_tag_versions([tag])
+    key = f'{COUNT_KEY_PREFIX}:{tag}:{version}'
+    count = cache.get(key)
+    if count is None:
+        count = FeedCounter.for_tag(tag)
+        if not reads_from_replica():
+            cache.add(key, count, settings.POSTS_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def feed_tag(group_id=None, author_id=None):
+    """Тег ленты: общей, группы или автора."""
+    if group_id is not None:
+        return f'feed:group:{group_id}'
+    if author_id is not None:
+        return f'feed:author:{author_id}'
+    return 'feed:index'
+
+
+def follows_tag(user_id):
+    """Тег подписок пользователя: от них зависят кнопки подписки."""
+    return f'follows:{user_id}'
+
+
+def post_feed_tags(group_id, author_id):
+    """Теги всех лент, в которые попадает пост."""
+    tags = [feed_tag(), feed_tag(author_id=author_id)]
+    if group_id is not None:
+        tags.append(feed_tag(group_id=group_id))
+    return tags
+
+
+def get_tag_versions(tags):
+    """Текущие версии тегов.
+
+    Версия — время последнего сброса тега. Тег, вытесненный из кеша,
+    получает новую версию, так что все зависящие от него записи
+    становятся недействительными.
+    """
+    keys = [f'{TAG_KEY_PREFIX}:{tag}' for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def feed_etag(modified, user):
+    """ETag страницы по времени ее изменения и посетителю.
+
+    Посетитель входит в ETag, так как меню в шапке персональное.
+    """
+    user_id = user.pk if user.is_authenticated else 0
+    return hashlib.md5(
+        f'{modified.isoformat()}:{user_id}'.encode()
+    ).hexdigest()
+
+
+def invalidate_tags(tags):
+    """Сбрасывает теги: все закешированное с ними устаревает."""
+    now = time.time()
+    cache.set_many({f'{TAG_KEY_PREFIX}:{tag}': now for tag in tags}, None)
+
+
+def cached_page(request):
+    """Номер страницы ленты, которую можно кешировать, или None.
+
+    Кешируются первые FEED_CACHE_PAGES страниц с единственным
+    параметром page: иначе произвольные строки запроса порождали бы
+    неограниченное число записей кеша.
+    """
+    page = request.GET.get('page', '1')
+    if set(request.GET) - {'page'} or not page.isdigit():
+        return None
+    if not 1 <= int(page) <= settings.FEED_CACHE_PAGES:
+        return None
+    return str(int(page))
+
+
+def feed_cache_context(request, tag):
+    """Переменные шаблона для кеширования отрисованной страницы ленты.
+
+    Ключ фрагмента включает версии тегов ленты и номер страницы,
+    поэтому сброс тега сигналом делает устаревшими все страницы ленты;
+    страницы, для которых cached_page возвращает None, и страницы,
+    прочитанные с реплики, не кешируются.
+    Теги и их версии запоминаются в запросе для кеша целых страниц;
+    если их уже прочитал condition_on_tags, берутся прочитанные.
+    """
+    tags = [ALL_FEEDS_TAG, tag]
+    cache_tags = getattr(request, 'cache_tags', None)
+    if cache_tags is None or cache_tags[0] != tags:
+        cache_tags = request.cache_tags = tags, get_tag_versions(tags)
+    versions = cache_tags[1]
+    page = cached_page(request)
+    cached = page is not None and not reads_from_replica()
+    return {
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT if cached else 0,
+        'feed_cache_key': (
+            f'{tag}:{settings.POSTS_PAGINATION}:{page}:{versions}'
+        ),
+    }
@@ -0,0 +1,149 @@
+"""Синтетические данные для нагрузочного тестирования.
+
+Тексты, имена и названия берутся из Faker, но Faker вызывается только
+для небольших пулов: посты собираются из готовых предложений, авторы и
+группы выбираются по заранее посчитанным накопленным весам. Все строки
+пишутся через bulk_create, поэтому генерация упирается в базу данных,
+а не в Python.
+"""
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts.models import Group, Post
+from posts.signals import posts_bulk_created
+
+User = get_user_model()
+
+SENTENCE_POOL = 5000
+
+
+@contextmanager
+def keep_pub_date():
+    """Отключает auto_now_add, чтобы сохранить заданные даты постов."""
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def zipf_weights(size, skew):
+    """Накопленные веса 1 / rank ** skew: при skew=0 распределение
+    равномерное, при skew около 1 несколько первых элементов получают
+    большую часть выборки."""
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, size + 1)
+    ))
+
+
+class DatasetGenerator:
+    """Генератор пользователей, групп и постов.
+
+    make_text(number) задает текст поста; по умолчанию пост собирается
+    из одного-пяти случайных предложений Faker.
+    """
+
+    def __init__(self, locale='ru_RU', seed=None, make_text=None):
+        self.random = random.Random(seed)
+        self.faker = Faker(locale)
+        self.faker.seed_instance(seed)
+        self.make_text = make_text or self.random_text
+        self.sentences = None
+
+    def random_text(self, number):
+        if self.sentences is None:
+            self.sentences = [
+                self.faker.sentence() for _ in range(SENTENCE_POOL)
+            ]
+        return ' '.join(
+            self.random.choices(self.sentences, k=self.random.randint(1, 5))
+        )
+
+    def create_users(self, count, batch_size):
+        """Создает пользователей без пароля и возвращает их id."""
+        last_id = User.objects.order_by('-pk').values_list(
+            'pk', flat=True,
+        ).first() or 0
+        password = make_password(None)
+        for start in range(0, count, batch_size):
+            User.objects.bulk_create(
+                User(
+                    username=f'{self.faker.user_name()}_{last_id + number}',
+                    first_name=self.faker.first_name(),
+                    last_name=self.faker.last_name(),
+                    password=password,
+                )
+                for number in range(start, min(start + batch_size, count))
+            )
+        return list(
+            User.objects.filter(pk__gt=last_id).values_list('pk', flat=True)
+        )
+
+    def create_groups(self, count):
+        """Создает группы и возвращает их id."""
+        last_id = Group.objects.order_by('-pk').values_list(
+            'pk', flat=True,
+        ).first() or 0
+        Group.objects.bulk_create(
+            Group(
+                title=self.faker.sentence(nb_words=3).rstrip('.')[:200],
+                slug=f'group-{last_id + number}',
+                description=self.faker.paragraph(),
+            )
+            for number in range(1, count + 1)
+        )
+        return list(
+            Group.objects.filter(pk__gt=last_id).values_list('pk', flat=True)
+        )
+
+    def create_posts(self, count, author_ids, group_ids, batch_size=10_000,
+                     skew=0, no_group_share=0.3, days=365, progress=None):
+        """Создает посты пакетами по batch_size.
+
+        Авторы и группы выбираются по закону Ципфа с показателем skew,
+        доля no_group_share постов остается без группы, даты равномерно
+        распределены по последним days дням.
+        """
+        author_weights = zipf_weights(len(author_ids), skew)
+        group_weights = zipf_weights(len(group_ids), skew)
+        now = timezone.now()
+        period = timedelta(days=days).total_seconds()
+        started = time.perf_counter()
+        with keep_pub_date():
+            for start in range(0, count, batch_size):
+                size = min(batch_size, count - start)
+                authors = self.random.choices(
+                    author_ids, cum_weights=author_weights, k=size,
+                )
+                groups = self.random.choices(
+                    group_ids, cum_weights=group_weights, k=size,
+                ) if group_ids else [None] * size
+                posts = [
+                    Post(
+                        text=self.make_text(start + number),
+                        author_id=authors[number],
+                        group_id=(
+                            None if self.random.random() < no_group_share
+                            else groups[number]
+                        ),
+                        pub_date=now - timedelta(
+                            seconds=self.random.random() * period,
+                        ),
+                    )
+                    for number in range(size)
+                ]
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+                    posts_bulk_created(posts)
+                if progress is not None:
+                    progress(start + size, time.perf_counter() - started)
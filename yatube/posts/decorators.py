@@ -0,0 +1,140 @@
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.views.decorators.http import condition
+
+from core.queries import track_queries
+from posts.cache import (ALL_FEEDS_TAG, feed_etag, feed_tag, follows_tag,
+                         get_tag_versions)
+from posts.models import FeedVersion, Group, Post
+
+User = get_user_model()
+logger = logging.getLogger('posts.queries')
+
+
+class QueryBudgetExceeded(Exception):
+    """View-функция выполнила больше запросов, чем ей разрешено."""
+
+
+def query_budget(budget):
+    """Бюджет запросов к базе данных view-функции.
+
+    Бюджет не зависит от размера страницы: запрос, выполняемый
+    для каждого поста (N+1), быстро его превышает. Пользователь
+    загружается до подсчета, поэтому запросы сессии в бюджет не входят.
+    Превышение записывается в лог posts.queries, а при
+    QUERY_BUDGET_STRICT (в тестах) вызывает QueryBudgetExceeded.
+    Содержимое потоковых ответов отдается после выхода из view-функции
+    и не учитывается.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            request.user.is_authenticated
+            with track_queries() as stats:
+                response = view(request, *args, **kwargs)
+            if stats['queries'] > budget:
+                message = (
+                    f'{view.__name__}: {stats["queries"]} запросов к базе '
+                    f'при бюджете {budget} ({request.get_full_path()})'
+                )
+                if settings.QUERY_BUDGET_STRICT:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        wrapper.query_budget = budget
+        return wrapper
+    return decorator
+
+
+def condition_on_tags(tags_func, follow_buttons=False):
+    """Условный GET (ETag / Last-Modified) по времени изменения страницы.
+
+    tags_func получает аргументы view-функции и возвращает теги страницы
+    и время изменения самого объекта страницы (None, если у страницы его
+    нет) или None, если объекта нет. Время изменения страницы — самое
+    позднее из него и FeedVersion тегов, которые сигналы обновляют вместе
+    с постами. Валидаторы вычисляются запросом tags_func и одним запросом
+    по первичному ключу, без отрисовки шаблонов; на совпадающий
+    If-None-Match или If-Modified-Since отвечает 304.
+
+    На страницах с кнопкой подписки (follow_buttons) в валидаторы
+    вошедшего посетителя входит и время изменения его подписок, которое
+    читается тем же запросом. В request.last_modified остается время
+    изменения общей части страницы: с ним страница сохраняется в кеш.
+    """
+    def modified(request, *args, **kwargs):
+        if not hasattr(request, 'last_modified'):
+            page = tags_func(*args, **kwargs)
+            request.last_modified = request.page_modified = None
+            if page is not None:
+                tags, object_modified = page
+                personal = []
+                if follow_buttons and request.user.is_authenticated:
+                    personal = [follows_tag(request.user.pk)]
+                # Версии тегов кеша читаются раньше базы: страница,
+                # сохраненная в кеш со старым временем изменения,
+                # устареет вместе с тегами
+                request.cache_tags = tags, get_tag_versions(tags)
+                versions = FeedVersion.modified_by_tag(tags + personal)
+                request.last_modified = max(filter(None, (
+                    object_modified,
+                    *(versions.get(tag, FeedVersion.UNCHANGED)
+                      for tag in tags),
+                )))
+                request.page_modified = max([
+                    request.last_modified,
+                    *(versions.get(tag, FeedVersion.UNCHANGED)
+                      for tag in personal),
+                ])
+        return request.page_modified
+
+    def etag(request, *args, **kwargs):
+        page_modified = modified(request, *args, **kwargs)
+        if page_modified is None:
+            return None
+        return feed_etag(page_modified, request.user)
+
+    def decorator(view):
+        view = condition(etag_func=etag, last_modified_func=modified)(view)
+        # По этому признаку кеш страниц добавляет подписки посетителя
+        # в валидаторы страницы из кеша
+        view.follow_buttons = follow_buttons
+        return view
+
+    return decorator
+
+
+def index_tags():
+    return [ALL_FEEDS_TAG, feed_tag()], None
+
+
+def group_tags(slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True,
+    ).first()
+    if group_id is None:
+        return None
+    return [ALL_FEEDS_TAG, feed_tag(group_id=group_id)], None
+
+
+def profile_tags(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True,
+    ).first()
+    if author_id is None:
+        return None
+    return [ALL_FEEDS_TAG, feed_tag(author_id=author_id)], None
+
+
+def post_detail_tags(post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'modified',
+    ).first()
+    if post is None:
+        return None
+    author_id, modified = post
+    # Лента автора меняется вместе с количеством его постов
+    return [ALL_FEEDS_TAG, feed_tag(author_id=author_id)], modified
@@ -0,0 +1,81 @@
+"""Потоковая выгрузка постов в JSONL и CSV.
+
+Таблица обходится частями по первичному ключу (`WHERE id > последний
+LIMIT chunk_size`), поэтому память не зависит от размера таблицы,
+а каждая часть выбирается одним запросом без OFFSET.
+"""
+import csv
+import json
+
+from posts.models import Post
+
+FIELDS = ('id', 'text', 'author', 'group', 'pub_date')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer, возвращающий строку."""
+
+    def write(self, value):
+        return value
+
+
+def filter_posts(since=None, until=None, group=None, author=None):
+    """Посты за период (даты включительно), группы и автора."""
+    posts = Post.objects.all()
+    if since is not None:
+        posts = posts.filter(pub_date__date__gte=since)
+    if until is not None:
+        posts = posts.filter(pub_date__date__lte=until)
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    return posts
+
+
+def export_rows(posts, chunk_size=1000):
+    """Строки выгрузки частями по chunk_size в порядке id."""
+    rows = posts.order_by('id').values_list(
+        'id', 'text', 'author__username', 'group__slug', 'pub_date',
+    )
+    last_id = 0
+    while True:
+        chunk = list(rows.filter(id__gt=last_id)[:chunk_size])
+        for post_id, text, author, group, pub_date in chunk:
+            yield {
+                'id': post_id,
+                'text': text,
+                'author': author,
+                'group': group or '',
+                'pub_date': pub_date.isoformat(),
+            }
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+def render_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def render_csv(rows):
+    writer = csv.DictWriter(Echo(), FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+RENDERERS = {
+    'jsonl': render_jsonl,
+    'csv': render_csv,
+}
+
+
+def export_posts(posts, file_format, chunk_size=1000):
+    """Генератор частей файла выгрузки в формате file_format."""
+    return RENDERERS[file_format](export_rows(posts, chunk_size))
@@ -8,3 +8,18 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group')
+
+
+class ExportForm(forms.Form):
+    """Параметры выгрузки постов."""
+    format = forms.ChoiceField(
+        choices=(('jsonl', 'JSONL'), ('csv', 'CSV')),
+        required=False,
+    )
+    since = forms.DateField(required=False)
+    until = forms.DateField(required=False)
+    group = forms.SlugField(required=False)
+    author = forms.CharField(required=False)
+
+    def clean_format(self):
+        return self.cleaned_data['format'] or 'jsonl'
@@ -0,0 +1,135 @@
+import math
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.benchmarks import benchmark_database, seed
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность чтения лент из нескольких '
+        'потоков без записи и во время создания и редактирования постов '
+        'на временной базе SQLite в файле.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность каждого этапа, с.',
+        )
+        parser.add_argument(
+            '--journal-mode', choices=('wal', 'delete'), default='wal',
+            help='Режим журнала SQLite для сравнения с WAL.',
+        )
+
+    def handle(self, *args, **options):
+        pragmas = {
+            **settings.SQLITE_PRAGMAS, 'journal_mode': options['journal_mode'],
+        }
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            SQLITE_PRAGMAS=pragmas,
+            FEED_CACHE_TIMEOUT=0,
+            PAGE_CACHE_TIMEOUT=0,
+            NPLUSONE_SAMPLE_RATE=0,
+            SLOW_QUERY_MS=math.inf,
+        ), benchmark_database(os.path.join(directory, 'bench.sqlite3')):
+            seed(options['posts'])
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                mode = cursor.fetchone()[0]
+            self.stdout.write(f'Режим журнала: {mode}')
+            for writers in (0, options['writers']):
+                result = self.run(
+                    options['readers'], writers, options['duration'],
+                )
+                self.stdout.write(
+                    f'читателей={options["readers"]} писателей={writers}: '
+                    f'чтений {result["reads_per_s"]:.0f}/с, '
+                    f'p50={result["read_p50_ms"]:.1f} мс, '
+                    f'p95={result["read_p95_ms"]:.1f} мс, '
+                    f'записей {result["writes_per_s"]:.0f}/с, '
+                    f'ошибок записи {result["write_errors"]}'
+                )
+
+    def run(self, readers, writers, duration):
+        """Читатели открывают главную страницу, писатели создают и
+        редактируют посты, пока не истечет duration."""
+        author = Post.objects.select_related('author').first().author
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.read_timings = []
+        self.writes = self.write_errors = 0
+        threads = [
+            threading.Thread(target=self.read) for _ in range(readers)
+        ] + [
+            threading.Thread(target=self.write, args=(author,))
+            for _ in range(writers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        timings = sorted(self.read_timings) or [0]
+        return {
+            'reads_per_s': len(self.read_timings) / duration,
+            'read_p50_ms': statistics.median(timings),
+            'read_p95_ms': timings[math.ceil(len(timings) * 0.95) - 1],
+            'writes_per_s': self.writes / duration,
+            'write_errors': self.write_errors,
+        }
+
+    def read(self):
+        client = Client()
+        timings = []
+        try:
+            while not self.stop.is_set():
+                started = time.perf_counter()
+                client.get(reverse('posts:index'))
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+        with self.lock:
+            self.read_timings.extend(timings)
+
+    def write(self, author):
+        client = Client()
+        client.force_login(author)
+        writes = errors = 0
+        try:
+            while not self.stop.is_set():
+                try:
+                    response = client.post(
+                        reverse('posts:post_create'),
+                        {'text': 'Пост из замера'},
+                    )
+                    post_id = Post.objects.filter(author=author).values_list(
+                        'pk', flat=True,
+                    ).first()
+                    client.post(
+                        reverse('posts:post_edit', args=[post_id]),
+                        {'text': 'Отредактированный пост'},
+                    )
+                except Exception:
+                    errors += 1
+                else:
+                    writes += response.status_code == 302
+        finally:
+            connection.close()
+        with self.lock:
+            self.writes += writes
+            self.write_errors += errors
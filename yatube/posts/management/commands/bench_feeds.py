@@ -0,0 +1,93 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts.benchmarks import benchmark_database, measure, seed
+from posts.models import Post
+from posts.utils import NEXT, KeysetPaginator
+
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def feed_querysets(group_id, author_id):
+    """Запросы лент в том виде, в котором их строят view-функции."""
+    return {
+        'index': Post.objects.select_related('author'),
+        'group_list': Post.objects.filter(group_id=group_id),
+        'profile': Post.objects.filter(author_id=author_id),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет временную базу и записывает EXPLAIN QUERY PLAN '
+        'и время выполнения запросов лент.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--authors', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--output', help='Сохранить отчет в JSON-файл.',
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            seed(options['posts'], options['authors'], options['groups'])
+            report = self.run(options['repeat'])
+        for name, result in report.items():
+            self.stdout.write(
+                f'{name:<24} p50={result["p50_ms"]:>9.3f} ms '
+                f'p95={result["p95_ms"]:>9.3f} ms'
+            )
+            for line in result['plan'].splitlines():
+                self.stdout.write(f'    {line}')
+            if TEMP_SORT in result['plan']:
+                self.stderr.write(
+                    self.style.WARNING(f'{name}: сортировка без индекса')
+                )
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+    def run(self, repeat):
+        # Самые большие группа и автор: худший случай для их лент.
+        group_id = self.busiest('group_id')
+        author_id = self.busiest('author_id')
+        report = {}
+        for name, posts in feed_querysets(group_id, author_id).items():
+            total = posts.count()
+            deep = max(total - settings.POSTS_COUNT, 0) // 2
+            anchor = posts[deep]
+            keyset = KeysetPaginator(posts, settings.POSTS_COUNT)
+            queries = {
+                f'{name}:first_page': posts[:settings.POSTS_COUNT],
+                f'{name}:deep_page': posts[deep:deep + settings.POSTS_COUNT],
+                f'{name}:keyset_page': keyset.keyset_queryset(
+                    NEXT, anchor.pub_date, anchor.pk,
+                )[:settings.POSTS_COUNT + 1],
+            }
+            for query_name, page in queries.items():
+                report[query_name] = {
+                    'plan': page.explain(),
+                    **measure(lambda: list(page.all()), repeat),
+                }
+            report[f'{name}:count'] = {
+                'plan': posts.values('id').explain(),
+                **measure(posts.count, repeat),
+            }
+        return report
+
+    def busiest(self, field):
+        return (
+            Post.objects.exclude(**{f'{field}__isnull': True})
+            .values(field)
+            .annotate(posts_count=Count('id'))
+            .order_by('-posts_count')
+            .values_list(field, flat=True)
+            .first()
+        )
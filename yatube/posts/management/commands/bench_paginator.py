@@ -0,0 +1,64 @@
+import timeit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import engines
+from django.template.loader import get_template
+
+FULL_RANGE_TEMPLATE = engines['django'].from_string(
+    '{% for i in page_obj.paginator.page_range %}'
+    '<li class="page-item"><a class="page-link" href="?page={{ i }}">'
+    '{{ i }}</a></li>'
+    '{% endfor %}'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время отрисовки includes/paginator.html '
+        'при разном количестве страниц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, nargs='+',
+            default=[10, 1_000, 20_000, 100_000, 1_000_000],
+            help='Количество страниц в ленте.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=200,
+            help='Количество отрисовок для каждого замера.',
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Для сравнения отрисовать полный page_range.',
+        )
+
+    def handle(self, *args, **options):
+        template = get_template('includes/paginator.html')
+        self.stdout.write(f'{"pages":>10} {"ms/render":>10} {"bytes":>8}')
+        for num_pages in options['pages']:
+            paginator = Paginator(
+                range(num_pages * settings.POSTS_COUNT),
+                settings.POSTS_COUNT,
+            )
+            context = {'page_obj': paginator.page(num_pages // 2 or 1)}
+            self.report(
+                num_pages, options['repeat'],
+                lambda: template.render(context),
+            )
+            if options['full']:
+                self.report(
+                    num_pages, max(options['repeat'] // 100, 1),
+                    lambda: FULL_RANGE_TEMPLATE.render(context),
+                    label='full',
+                )
+
+    def report(self, num_pages, repeat, render, label=''):
+        html = render()
+        seconds = timeit.timeit(render, number=repeat)
+        self.stdout.write(
+            f'{num_pages:>10} {seconds / repeat * 1000:>10.3f} '
+            f'{len(html):>8} {label}'
+        )
@@ -0,0 +1,74 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand
+
+from posts.benchmarks import benchmark_database, measure, seed
+from posts.models import Post
+from posts.search import search_posts
+
+WORDS_PER_POST = 20
+
+
+def vocabulary(size):
+    """Словарь из случайных слов длиной от 4 до 10 букв."""
+    letters = 'абвгдежзиклмнопрстуфхцчшэюя'
+    return [
+        ''.join(random.choices(letters, k=random.randint(4, 10)))
+        for _ in range(size)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет временную базу постами со случайным текстом и сравнивает '
+        'поиск по индексу FTS5 с LIKE-поиском text__icontains.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--words', type=int, default=50_000)
+        parser.add_argument('--queries', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--output', help='Сохранить отчет в JSON-файл.',
+        )
+
+    def handle(self, *args, **options):
+        words = vocabulary(options['words'])
+        # Частые и редкие слова: распределение Ципфа по номеру слова
+        weights = [1 / rank for rank in range(1, len(words) + 1)]
+
+        def make_text(number):
+            return ' '.join(
+                random.choices(words, weights, k=WORDS_PER_POST)
+            )
+
+        frequent = words[:len(words) // 10]
+        queries = random.sample(frequent, options['queries'] // 2)
+        queries += random.sample(words, options['queries'] - len(queries))
+        with benchmark_database():
+            seed(options['posts'], make_text=make_text)
+            report = self.run(queries, options['repeat'])
+        for name, result in report.items():
+            self.stdout.write(
+                f'{name:<32} p50={result["p50_ms"]:>10.3f} ms '
+                f'p95={result["p95_ms"]:>10.3f} ms'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+    def run(self, queries, repeat):
+        report = {}
+        for query in queries:
+            searches = {
+                f'fts:{query}': search_posts(query),
+                f'icontains:{query}': Post.objects.filter(
+                    text__icontains=query,
+                ),
+            }
+            for name, posts in searches.items():
+                page = posts.select_related('author', 'group')[:10]
+                report[name] = measure(lambda: list(page.all()), repeat)
+        return report
@@ -0,0 +1,167 @@
+import math
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.servers.basehttp import (ThreadedWSGIServer,
+                                          WSGIRequestHandler, WSGIServer,
+                                          get_wsgi_application)
+from django.test import override_settings
+
+from posts.benchmarks import benchmark_database, seed
+
+RECEIVE_BUFFER = 4096
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """WSGI-сервер с ограниченным пулом потоков, как у gunicorn gthread."""
+
+    def __init__(self, *args, workers, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет запросы в секунду WSGI-сервера под нагрузкой медленных '
+        'клиентов: один поток, ограниченный пул потоков и поток на '
+        'соединение. Клиенты медленно отправляют заголовки и читают '
+        'ответ, занимая поток сервера на все это время.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Размер пула потоков сервера.',
+        )
+        parser.add_argument(
+            '--delay', type=float, default=0.05,
+            help='Пауза клиента перед концом заголовков и между чтениями '
+                 'ответа, с.',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность замера каждого сервера, с.',
+        )
+
+    def handle(self, *args, **options):
+        servers = {
+            'один поток': lambda address: WSGIServer(
+                address, QuietRequestHandler,
+            ),
+            f'пул из {options["workers"]}': lambda address: PooledWSGIServer(
+                address, QuietRequestHandler, workers=options['workers'],
+            ),
+            'поток на соединение': lambda address: ThreadedWSGIServer(
+                address, QuietRequestHandler,
+            ),
+        }
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            FEED_CACHE_TIMEOUT=0,
+            PAGE_CACHE_TIMEOUT=0,
+            NPLUSONE_SAMPLE_RATE=0,
+            SLOW_QUERY_MS=math.inf,
+        ), benchmark_database(os.path.join(directory, 'bench.sqlite3')):
+            seed(options['posts'])
+            application = get_wsgi_application()
+            for name, make_server in servers.items():
+                server = make_server(('127.0.0.1', 0))
+                server.set_app(application)
+                thread = threading.Thread(target=server.serve_forever)
+                thread.start()
+                try:
+                    result = self.run(
+                        server.server_address, options['clients'],
+                        options['delay'], options['duration'],
+                    )
+                finally:
+                    server.shutdown()
+                    server.server_close()
+                    thread.join()
+                self.stdout.write(
+                    f'{name:<20} {result["requests_per_s"]:>7.1f} запр./с '
+                    f'p50={result["p50_ms"]:.0f} мс '
+                    f'p95={result["p95_ms"]:.0f} мс '
+                    f'ошибок {result["errors"]}'
+                )
+
+    def run(self, address, clients, delay, duration):
+        stop = threading.Event()
+        lock = threading.Lock()
+        timings = []
+        errors = []
+
+        def client():
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    self.slow_request(address, delay)
+                except OSError:
+                    with lock:
+                        errors.append(1)
+                    continue
+                with lock:
+                    timings.append((time.perf_counter() - started) * 1000)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        completed = sorted(timings) or [0]
+        return {
+            'requests_per_s': len(timings) / duration,
+            'p50_ms': statistics.median(completed),
+            'p95_ms': completed[math.ceil(len(completed) * 0.95) - 1],
+            'errors': len(errors),
+        }
+
+    def slow_request(self, address, delay):
+        """GET / с паузой посреди заголовков и медленным чтением.
+
+        Маленький буфер приема не дает ядру принять ответ целиком за
+        клиента: сервер ждет, пока клиент дочитает.
+        """
+        with socket.socket() as connection:
+            connection.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER,
+            )
+            connection.settimeout(30)
+            connection.connect(address)
+            connection.sendall(b'GET / HTTP/1.0\r\n')
+            time.sleep(delay)
+            connection.sendall(b'Host: 127.0.0.1\r\n\r\n')
+            while True:
+                chunk = connection.recv(RECEIVE_BUFFER)
+                if not chunk:
+                    break
+                time.sleep(delay)
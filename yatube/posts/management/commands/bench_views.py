@@ -0,0 +1,118 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.benchmarks import (benchmark_database, compare_reports,
+                              profile_request)
+from posts.dataset import DatasetGenerator
+from posts.models import Post
+
+
+def view_requests(client, author, group, post):
+    """Запросы к view-функциям, как их делает браузер автора."""
+    return {
+        'index': lambda: client.get(reverse('posts:index')),
+        'group_posts': lambda: client.get(
+            reverse('posts:group_list', kwargs={'slug': group}),
+        ),
+        'profile': lambda: client.get(
+            reverse('posts:profile', kwargs={'username': author}),
+        ),
+        'post_detail': lambda: client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post}),
+        ),
+        'post_create:get': lambda: client.get(reverse('posts:post_create')),
+        'post_create:post': lambda: client.post(
+            reverse('posts:post_create'), {'text': 'Пост из замера'},
+        ),
+        'post_edit:get': lambda: client.get(
+            reverse('posts:post_edit', kwargs={'post_id': post}),
+        ),
+        'post_edit:post': lambda: client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post}),
+            {'text': 'Отредактированный пост'},
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет view-функции через тестовый клиент на временных базах '
+        'разного размера: p50/p95, количество и время SQL-запросов, время '
+        'отрисовки шаблонов. Кеш лент и страниц отключен.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+',
+            default=[1_000, 10_000, 100_000],
+            help='Количества постов в базе.',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--output', help='Сохранить отчет в JSON-файл.',
+        )
+        parser.add_argument(
+            '--baseline', help='JSON-отчет прошлого запуска для сравнения.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 относительно базового отчета.',
+        )
+
+    def handle(self, *args, **options):
+        report = {}
+        with override_settings(FEED_CACHE_TIMEOUT=0, PAGE_CACHE_TIMEOUT=0):
+            for size in options['sizes']:
+                with benchmark_database():
+                    report[str(size)] = self.run(size, options['repeat'])
+        for size, views in report.items():
+            self.stdout.write(f'Постов: {size}')
+            for view, result in views.items():
+                self.stdout.write(
+                    f'  {view:<18} p50={result["p50_ms"]:>9.3f} ms '
+                    f'p95={result["p95_ms"]:>9.3f} ms '
+                    f'SQL={result["queries"]:>3} '
+                    f'({result["sql_ms"]:.3f} ms) '
+                    f'шаблоны={result["render_ms"]:.3f} ms'
+                )
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                json.dump(report, report_file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = compare_reports(
+                report, baseline, options['tolerance'],
+            )
+            if regressions:
+                raise CommandError(
+                    'Регрессии относительно базового отчета:\n'
+                    + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run(self, size, repeat):
+        generator = DatasetGenerator(seed=0)
+        author_ids = generator.create_users(max(size // 100, 10), 10_000)
+        group_ids = generator.create_groups(max(size // 1000, 5))
+        generator.create_posts(size, author_ids, group_ids, skew=1.1)
+        # Самые большие автор и группа: худший случай для их страниц
+        busiest = Post.objects.order_by().values('author').annotate(
+            posts_count=Count('id'),
+        ).order_by('-posts_count').first()['author']
+        post = Post.objects.filter(
+            author_id=busiest, group__isnull=False,
+        ).select_related('author', 'group').first()
+        client = Client()
+        client.force_login(post.author)
+        requests = view_requests(
+            client, post.author.username, post.group.slug, post.pk,
+        )
+        return {
+            name: profile_request(request, repeat)
+            for name, request in requests.items()
+        }
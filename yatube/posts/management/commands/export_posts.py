@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import export_posts, filter_posts
+from posts.forms import ExportForm
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты с username автора и slug группы в JSONL или CSV, '
+        'обходя таблицу частями по первичному ключу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', default='jsonl', help='jsonl или csv.',
+        )
+        parser.add_argument(
+            '--output', help='Файл выгрузки; по умолчанию stdout.',
+        )
+        parser.add_argument('--since', help='Начальная дата, YYYY-MM-DD.')
+        parser.add_argument('--until', help='Конечная дата, YYYY-MM-DD.')
+        parser.add_argument('--group', help='Slug группы.')
+        parser.add_argument('--author', help='Username автора.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Количество постов в одном запросе.',
+        )
+
+    def handle(self, *args, **options):
+        form = ExportForm({
+            name: options[name]
+            for name in ('format', 'since', 'until', 'group', 'author')
+            if options[name] is not None
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        params = form.cleaned_data
+        file_format = params.pop('format')
+        chunks = export_posts(
+            filter_posts(**params), file_format, options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
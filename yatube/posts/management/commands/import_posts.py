@@ -0,0 +1,210 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.dataset import keep_pub_date
+from posts.models import Group, Post
+from posts.signals import posts_bulk_created
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+
+
+def read_records(path, file_format):
+    """Построчно читает записи файла, не загружая его целиком.
+
+    Вместо строки, которая не является объектом JSON, выдается None:
+    такая запись пропускается.
+    """
+    with open(path, encoding='utf-8', newline='') as source:
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else None
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из файла JSONL или CSV с полями text, author '
+        '(username), group (slug) и pub_date (ISO 8601).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество постов в одном bulk_create.',
+        )
+        parser.add_argument(
+            '--batches-per-transaction', type=int, default=10,
+            help='Количество пакетов в одной транзакции.',
+        )
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='Создавать отсутствующих авторов без пароля.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с количеством обработанных записей для продолжения.',
+        )
+        parser.add_argument(
+            '--offset', type=int,
+            help='Пропустить первые записи файла (по умолчанию из '
+                 'checkpoint).',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        file_format = options['format'] or os.path.splitext(
+            path
+        )[1].lstrip('.').lower()
+        if file_format not in FORMATS:
+            raise CommandError('Укажите формат файла: --format jsonl|csv')
+        self.batch_size = options['batch_size']
+        self.create_authors = options['create_authors']
+        self.checkpoint = options['checkpoint']
+        self.authors = {}
+        self.groups = {}
+        self.imported = self.skipped = 0
+
+        offset = options['offset']
+        if offset is None:
+            offset = self.read_checkpoint()
+        records = islice(read_records(path, file_format), offset, None)
+        chunk_size = self.batch_size * options['batches_per_transaction']
+        started = time.perf_counter()
+        with keep_pub_date():
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk)
+                offset += len(chunk)
+                self.write_checkpoint(offset)
+                self.report(offset, started)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Импортировано постов: {self.imported}, '
+            f'пропущено записей: {self.skipped}, '
+            f'время: {elapsed:.1f} с, '
+            f'{self.imported / max(elapsed, 1e-9):.0f} постов/с'
+        )
+
+    def import_chunk(self, chunk):
+        """Записывает часть файла одной транзакцией."""
+        with transaction.atomic():
+            self.resolve(chunk)
+            posts = [
+                post for post in map(self.build_post, chunk)
+                if post is not None
+            ]
+            for start in range(0, len(posts), self.batch_size):
+                Post.objects.bulk_create(
+                    posts[start:start + self.batch_size],
+                )
+            posts_bulk_created(posts)
+        self.imported += len(posts)
+        self.skipped += len(chunk) - len(posts)
+
+    def resolve(self, chunk):
+        """Дополняет карты авторов и групп одним запросом на часть."""
+        usernames = {
+            record.get('author') for record in chunk if record
+        } - set(self.authors) - {None, ''}
+        slugs = {
+            record.get('group') for record in chunk if record
+        } - set(self.groups) - {None, ''}
+        if usernames:
+            self.authors.update(
+                User.objects.filter(username__in=usernames)
+                .values_list('username', 'id')
+            )
+            missing = usernames - set(self.authors)
+            if missing and self.create_authors:
+                User.objects.bulk_create(
+                    User(username=username, password=make_password(None))
+                    for username in missing
+                )
+                self.authors.update(
+                    User.objects.filter(username__in=missing)
+                    .values_list('username', 'id')
+                )
+        if slugs:
+            self.groups.update(
+                Group.objects.filter(slug__in=slugs)
+                .values_list('slug', 'id')
+            )
+
+    def build_post(self, record):
+        if not record or not record.get('text'):
+            return None
+        author_id = self.authors.get(record.get('author'))
+        if author_id is None:
+            return None
+        group_id = None
+        if record.get('group'):
+            group_id = self.groups.get(record['group'])
+            if group_id is None:
+                return None
+        pub_date = timezone.now()
+        if record.get('pub_date'):
+            try:
+                pub_date = parse_datetime(record['pub_date'])
+            except ValueError:
+                return None
+            if pub_date is None:
+                return None
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        return Post(
+            text=record['text'],
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date,
+        )
+
+    def read_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return 0
+        with open(self.checkpoint) as checkpoint:
+            return int(checkpoint.read().strip() or 0)
+
+    def write_checkpoint(self, offset):
+        """Сохраняет позицию после фиксации транзакции."""
+        if not self.checkpoint:
+            return
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            checkpoint.write(str(offset))
+        os.replace(temporary, self.checkpoint)
+
+    def report(self, offset, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Обработано записей: {offset}, '
+            f'{self.imported / max(elapsed, 1e-9):.0f} постов/с'
+        )
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import Post, PostsCounter
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и исправляет счетчики постов авторов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество авторов, обрабатываемых в одной транзакции.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не исправляя.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = repaired = 0
+        while True:
+            author_ids = list(
+                User.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not author_ids:
+                break
+            last_id = author_ids[-1]
+            checked += len(author_ids)
+            repaired += self.repair(author_ids, options['dry_run'])
+        self.stdout.write(
+            f'Проверено авторов: {checked}, исправлено счетчиков: {repaired}'
+        )
+
+    def repair(self, author_ids, dry_run):
+        with transaction.atomic():
+            actual = dict(
+                Post.objects.filter(author_id__in=author_ids)
+                .values('author_id')
+                .annotate(posts_count=Count('id'))
+                .order_by()
+                .values_list('author_id', 'posts_count')
+            )
+            stored = PostsCounter.objects.select_for_update().in_bulk(
+                author_ids,
+            )
+            to_create, to_update = [], []
+            for author_id in author_ids:
+                posts_count = actual.get(author_id, 0)
+                counter = stored.get(author_id)
+                if counter is None:
+                    if not posts_count:
+                        continue
+                    to_create.append(PostsCounter(
+                        author_id=author_id, posts_count=posts_count,
+                    ))
+                elif counter.posts_count != posts_count:
+                    counter.posts_count = posts_count
+                    to_update.append(counter)
+            if not dry_run:
+                PostsCounter.objects.bulk_create(to_create)
+                PostsCounter.objects.bulk_update(to_update, ['posts_count'])
+        return len(to_create) + len(to_update)
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.dataset import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими пользователями, группами и постами '
+        'с неравномерным распределением по авторам и группам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument(
+            '--batch-size', type=int, default=10_000,
+            help='Количество строк в одном bulk_create.',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа; 0 — равномерное распределение.',
+        )
+        parser.add_argument(
+            '--no-group-share', type=float, default=0.3,
+            help='Доля постов без группы.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределить даты постов.',
+        )
+        parser.add_argument('--locale', default='ru_RU')
+        parser.add_argument(
+            '--seed', type=int,
+            help='Зерно генератора для воспроизводимого набора.',
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] > 0 and options['users'] < 1:
+            raise CommandError('Для постов нужен хотя бы один пользователь')
+        generator = DatasetGenerator(options['locale'], options['seed'])
+        started = time.perf_counter()
+        author_ids = generator.create_users(
+            options['users'], options['batch_size'],
+        )
+        group_ids = generator.create_groups(options['groups'])
+        self.stdout.write(
+            f'Создано пользователей: {len(author_ids)}, '
+            f'групп: {len(group_ids)}'
+        )
+        generator.create_posts(
+            options['posts'],
+            author_ids,
+            group_ids,
+            options['batch_size'],
+            skew=options['skew'],
+            no_group_share=options['no_group_share'],
+            days=options['days'],
+            progress=self.report,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {elapsed:.1f} с'
+        ))
+
+    def report(self, created, elapsed):
+        self.stdout.write(
+            f'Создано постов: {created}, '
+            f'{created / max(elapsed, 1e-9) * 60:.0f} постов/мин'
+        )
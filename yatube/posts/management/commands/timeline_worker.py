@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts.timeline import process_tasks, trim_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает задачи лент подписок: рассылает новые посты по '
+        'лентам подписчиков и обновляет ленты после подписки и отписки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить накопившиеся задачи и завершиться.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько задач выбирать за раз.',
+        )
+        parser.add_argument(
+            '--trim', action='store_true',
+            help='Обрезать ленты до TIMELINE_LENGTH постов и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        if options['trim']:
+            removed = trim_timelines()
+            self.stdout.write(f'Удалено записей лент: {removed}')
+            return
+        processed = 0
+        while True:
+            done = process_tasks(options['batch_size'])
+            processed += done
+            if done:
+                continue
+            if options['once']:
+                break
+            close_old_connections()
+            time.sleep(settings.TIMELINE_WORKER_INTERVAL)
+        self.stdout.write(f'Выполнено задач: {processed}')
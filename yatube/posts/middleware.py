@@ -0,0 +1,149 @@
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.fragments import render_fragments, split_fragments
+from core.routers import read_from_primary, reads_from_replica
+from posts.cache import (cached_page, feed_etag, follows_tag,
+                         get_tag_versions)
+from posts.models import FeedVersion
+
+PAGE_KEY_PREFIX = 'posts:page'
+CACHED_VIEWS = frozenset((
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+))
+CACHE_HIT_HEADER = 'X-Page-Cache'
+# Длина ответа и валидаторы зависят от посетителя
+SKIPPED_HEADERS = frozenset(('content-length', 'etag', 'last-modified'))
+
+
+class FeedPageCacheMiddleware:
+    """Кеш целых страниц лент, общий для всех посетителей.
+
+    В кеше хранится страница без персональных фрагментов
+    ({% personal_fragment %}): они отрисовываются для каждого запроса.
+
+    Анонимный запрос (без cookie сессии) отдается из кеша прямо здесь,
+    до SessionMiddleware: попадание не трогает ни сессию, ни базу данных.
+    Заголовки ответа сохраняются вместе с ним, так как внутренние
+    middleware при таком попадании не вызываются. Запрос с сессией
+    отдается из кеша в process_view, когда пользователь уже известен.
+
+    Запись хранит теги ленты и их версии на момент отрисовки; сброс тега
+    сигналом делает устаревшими только страницы с этим тегом. Время
+    изменения ленты для валидаторов сохраняется вместе со страницей:
+    пока теги не сброшены, оно не меняется. На страницах с кнопкой
+    подписки к нему для вошедшего посетителя добавляется время изменения
+    его подписок: это один запрос по первичному ключу.
+
+    При промахе страница читается из основной базы: отстающая реплика
+    сохранила бы под новыми версиями тегов старые данные и старое
+    время изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = self.cache_key(request)
+        if key is None:
+            return self.get_response(request)
+        request.page_cache_key = key
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            response = self.cached_response(request)
+            if response is not None:
+                return response
+        response = self.get_response(request)
+        self.store(key, request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(request, 'page_cache_key', None) is None:
+            return None
+        response = self.cached_response(request)
+        if response is None:
+            read_from_primary()
+        return response
+
+    def cache_key(self, request):
+        if not settings.PAGE_CACHE_TIMEOUT:
+            return None
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.view_name not in CACHED_VIEWS:
+            return None
+        page = cached_page(request)
+        if page is None:
+            return None
+        # Активный пункт меню во фрагментах зависит от страницы
+        request.resolver_match = match
+        path = hashlib.md5(request.path.encode()).hexdigest()
+        return f'{PAGE_KEY_PREFIX}:{path}:{page}'
+
+    def cached_response(self, request):
+        entry = cache.get(request.page_cache_key)
+        if entry is None:
+            return None
+        tags, versions, modified, parts, headers = entry
+        if get_tag_versions(tags) != versions:
+            return None
+        user = getattr(request, 'user', AnonymousUser())
+        if user.is_authenticated and getattr(
+            request.resolver_match.func, 'follow_buttons', False,
+        ):
+            modified = max(
+                modified, FeedVersion.last_modified([follows_tag(user.pk)]),
+            )
+        etag = quote_etag(feed_etag(modified, user))
+        last_modified = timegm(modified.utctimetuple())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified,
+        )
+        if response is None:
+            response = HttpResponse(render_fragments(parts, request))
+            for header, value in headers:
+                response[header] = value
+            response['Content-Length'] = len(response.content)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response[CACHE_HIT_HEADER] = 'hit'
+        return response
+
+    def store(self, key, request, response):
+        cache_tags = getattr(request, 'cache_tags', None)
+        modified = getattr(request, 'last_modified', None)
+        if (
+            cache_tags is None
+            or modified is None
+            or reads_from_replica()
+            or request.method != 'GET'
+            or response.status_code != 200
+            or response.streaming
+            or response.cookies
+            or response.has_header(CACHE_HIT_HEADER)
+        ):
+            return
+        tags, versions = cache_tags
+        parts = split_fragments(response.content.decode(response.charset))
+        headers = [
+            (header, value) for header, value in response.items()
+            if header.lower() not in SKIPPED_HEADERS
+        ]
+        cache.set(
+            key,
+            (tags, versions, modified, parts, headers),
+            settings.PAGE_CACHE_TIMEOUT,
+        )
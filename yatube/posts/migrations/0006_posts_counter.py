@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_posts_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostsCounter = apps.get_model('posts', 'PostsCounter')
+    counts = (
+        Post.objects.values('author_id')
+        .annotate(posts_count=models.Count('id'))
+        .order_by()
+    )
+    PostsCounter.objects.bulk_create(
+        (
+            PostsCounter(author_id=row['author_id'],
+                         posts_count=row['posts_count'])
+            for row in counts.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0005_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostsCounter',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='posts_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+        ),
+        migrations.RunPython(fill_posts_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from posts.search import create_fts_index, drop_fts_index
+
+
+def create_index(apps, schema_editor):
+    create_fts_index(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    drop_fts_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_posts_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:39
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def start_feed_versions(apps, schema_editor):
+    # Тег всех лент входит в валидаторы каждой страницы: до первого
+    # изменения они равны времени миграции
+    FeedVersion = apps.get_model('posts', 'FeedVersion')
+    FeedVersion.objects.create(tag='feed:all', modified=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_timelines'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedVersion',
+            fields=[
+                ('tag', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Тег')),
+                ('modified', models.DateTimeField(verbose_name='Время изменения')),
+            ],
+        ),
+        migrations.RunPython(start_feed_versions, migrations.RunPython.noop),
+    ]
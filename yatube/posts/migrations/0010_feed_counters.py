@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+def fill_feed_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    FeedCounter = apps.get_model('posts', 'FeedCounter')
+    counters = [
+        FeedCounter(tag='feed:index', posts_count=Post.objects.count()),
+    ]
+    for field, prefix in (('group_id', 'feed:group'),
+                          ('author_id', 'feed:author')):
+        counts = (
+            Post.objects.exclude(**{field: None}).values(field)
+            .annotate(posts_count=models.Count('id'))
+            .order_by()
+        )
+        counters.extend(
+            FeedCounter(tag=f'{prefix}:{row[field]}',
+                        posts_count=row['posts_count'])
+            for row in counts.iterator()
+        )
+    FeedCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_feed_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedCounter',
+            fields=[
+                ('tag', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Тег ленты')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+        ),
+        migrations.RunPython(fill_feed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:01
+
+from django.db import migrations, models
+
+from posts.search import create_fts_triggers
+
+
+def drop_post_versions(apps, schema_editor):
+    # Время изменения поста теперь хранится в самом посте
+    FeedVersion = apps.get_model('posts', 'FeedVersion')
+    FeedVersion.objects.filter(tag__startswith='post:').delete()
+
+
+def restore_fts_triggers(apps, schema_editor):
+    # AddField и RemoveField пересоздают таблицу posts_post без триггеров
+    create_fts_triggers(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feed_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Время изменения'),
+        ),
+        migrations.RunPython(restore_fts_triggers, migrations.RunPython.noop),
+        migrations.RunPython(drop_post_versions, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+from datetime import datetime
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 from yatube.settings import FIRST_CHARACTERS
 
@@ -30,11 +33,18 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True,
     )
+    # Валидаторы условных GET страницы поста
+    modified = models.DateTimeField(
+        verbose_name='Время изменения',
+        auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='posts',
         verbose_name='Автор публикации',
+        # Покрывается составным индексом (author, -pub_date, -id)
+        db_index=False,
     )
     group = models.ForeignKey(
         Group,
@@ -43,10 +53,338 @@ class Post(models.Model):
         blank=True,
         null=True,
         verbose_name='Группа',
+        # Покрывается составным индексом (group, -pub_date, -id)
+        db_index=False,
     )
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:FIRST_CHARACTERS]
+
+
+class PostsCounter(models.Model):
+    """Денормализованное количество постов автора.
+
+    Поддерживается сигналами сохранения и удаления постов,
+    восстанавливается командой recount_posts.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='posts_counter',
+        verbose_name='Автор',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов',
+    )
+
+    def __str__(self):
+        return f'{self.author_id}: {self.posts_count}'
+
+    @classmethod
+    def change(cls, author_id, delta):
+        """Атомарно меняет счетчик автора на delta.
+
+        Недостающий счетчик создается только при добавлении поста:
+        при удалении автор может удаляться вместе со своим счетчиком.
+        """
+        updated = cls.objects.filter(author_id=author_id).update(
+            posts_count=models.F('posts_count') + delta,
+        )
+        if not updated and delta > 0:
+            cls.objects.get_or_create(
+                author_id=author_id,
+                defaults={
+                    'posts_count': Post.objects.filter(
+                        author_id=author_id,
+                    ).count(),
+                },
+            )
+
+    @staticmethod
+    def for_author(author):
+        """Количество постов автора, загруженного с select_related."""
+        try:
+            return author.posts_counter.posts_count
+        except PostsCounter.DoesNotExist:
+            return 0
+
+
+class FeedCounter(models.Model):
+    """Денормализованное количество постов ленты по ее тегу.
+
+    Меняется сигналами в той же транзакции, что и посты, поэтому
+    откаченная или повторенная запись его не портит.
+    """
+    tag = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name='Тег ленты',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов',
+    )
+
+    def __str__(self):
+        return f'{self.tag}: {self.posts_count}'
+
+    @classmethod
+    def change(cls, feeds, delta):
+        """Меняет счетчики лент на delta.
+
+        feeds — словарь {тег: посты ленты}. Недостающий счетчик
+        создается подсчетом постов только при добавлении поста.
+        """
+        updated = cls.objects.filter(tag__in=feeds).update(
+            posts_count=models.F('posts_count') + delta,
+        )
+        if updated == len(feeds) or delta < 0:
+            return
+        existing = set(cls.objects.filter(tag__in=feeds).values_list(
+            'tag', flat=True,
+        ))
+        cls.objects.bulk_create(
+            [
+                cls(tag=tag, posts_count=posts.count())
+                for tag, posts in feeds.items() if tag not in existing
+            ],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def for_tag(cls, tag):
+        return cls.objects.filter(tag=tag).values_list(
+            'posts_count', flat=True,
+        ).first() or 0
+
+
+class FeedVersion(models.Model):
+    """Время последнего изменения ленты по тегу кеша.
+
+    Обновляется сигналами в той же транзакции, что и само изменение,
+    поэтому валидаторы условных GET берутся из зафиксированных данных
+    и одинаковы во всех процессах.
+    """
+    # Время для тегов без изменений: таблица пуста после очистки базы
+    UNCHANGED = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    tag = models.CharField(
+        max_length=64,
+        primary_key=True,
+        verbose_name='Тег',
+    )
+    modified = models.DateTimeField(
+        verbose_name='Время изменения',
+    )
+
+    def __str__(self):
+        return f'{self.tag}: {self.modified}'
+
+    @classmethod
+    def touch(cls, tags, now=None):
+        """Отмечает изменение лент с тегами tags временем now.
+
+        По умолчанию — текущим временем; сигналы поста передают время
+        его изменения, чтобы валидаторы поста и его лент совпадали.
+        """
+        now = now or timezone.now()
+        updated = cls.objects.filter(tag__in=tags).update(modified=now)
+        if updated < len(tags):
+            cls.objects.bulk_create(
+                [cls(tag=tag, modified=now) for tag in tags],
+                ignore_conflicts=True,
+            )
+
+    @classmethod
+    def modified_by_tag(cls, tags):
+        """Время изменения каждого из тегов, у которых оно есть."""
+        return dict(cls.objects.filter(tag__in=tags).values_list(
+            'tag', 'modified',
+        ))
+
+    @classmethod
+    def last_modified(cls, tags):
+        """Самое позднее изменение среди тегов: один запрос по ключу."""
+        modified = cls.objects.filter(tag__in=tags).aggregate(
+            modified=models.Max('modified'),
+        )['modified']
+        return modified or cls.UNCHANGED
+
+
+class Follow(models.Model):
+    """Подписка пользователя на автора."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='follow_not_self',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}'
+
+
+class GroupFollow(models.Model):
+    """Подписка пользователя на группу."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_follower',
+        verbose_name='Подписчик',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Группа',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'group'],
+                name='unique_group_follow',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.group_id}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в готовой ленте подписок пользователя.
+
+    Записи добавляются при публикации поста (posts.timeline), поэтому
+    страница ленты читается одним запросом по индексу
+    (user, -pub_date, -post). Дата публикации копируется из поста,
+    чтобы порядок ленты брался из индекса без обращения к постам.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+        # Покрывается индексом уникальности (user, post)
+        db_index=False,
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+
+class TimelineTask(models.Model):
+    """Задача обработчика лент, записанная вместе с изменением.
+
+    Задача попадает в базу в той же транзакции, что и пост или
+    подписка, поэтому не теряется при остановке обработчика
+    (команда timeline_worker).
+    """
+    FAN_OUT = 'fan_out'
+    FOLLOW_AUTHOR = 'follow_author'
+    UNFOLLOW_AUTHOR = 'unfollow_author'
+    FOLLOW_GROUP = 'follow_group'
+    UNFOLLOW_GROUP = 'unfollow_group'
+    ACTIONS = (
+        (FAN_OUT, 'Разослать пост'),
+        (FOLLOW_AUTHOR, 'Подписка на автора'),
+        (UNFOLLOW_AUTHOR, 'Отписка от автора'),
+        (FOLLOW_GROUP, 'Подписка на группу'),
+        (UNFOLLOW_GROUP, 'Отписка от группы'),
+    )
+
+    action = models.CharField(
+        max_length=16,
+        choices=ACTIONS,
+        verbose_name='Действие',
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+        verbose_name='Группа',
+    )
+
+    def __str__(self):
+        return f'{self.pk}: {self.action}'
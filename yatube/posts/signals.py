@@ -0,0 +1,152 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from posts.cache import (ALL_FEEDS_TAG, feed_tag, invalidate_tags,
+                         post_feed_tags)
+from posts.models import (FeedCounter, FeedVersion, Group, Post, PostsCounter,
+                          TimelineTask)
+
+
+def feed_posts(group_id, author_id):
+    """Теги лент, в которые попадает пост, и посты каждой ленты."""
+    feeds = {
+        feed_tag(): Post.objects.all(),
+        feed_tag(author_id=author_id): Post.objects.filter(
+            author_id=author_id,
+        ),
+    }
+    if group_id is not None:
+        feeds[feed_tag(group_id=group_id)] = Post.objects.filter(
+            group_id=group_id,
+        )
+    return feeds
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, raw, **kwargs):
+    """Запоминает группу и автора поста до редактирования."""
+    instance._previous = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous = Post.objects.filter(pk=instance.pk).values(
+        'group_id', 'author_id',
+    ).first()
+
+
+@receiver(post_save, sender=Post)
+def update_counts_on_save(sender, instance, created, raw, **kwargs):
+    """Меняет счетчики лент в той же транзакции, что и пост."""
+    new_feeds = feed_posts(instance.group_id, instance.author_id)
+    previous = getattr(instance, '_previous', None)
+    if created:
+        FeedCounter.change(new_feeds, 1)
+    elif previous is not None:
+        old_feeds = feed_posts(previous['group_id'], previous['author_id'])
+        left = {
+            tag: posts for tag, posts in old_feeds.items()
+            if tag not in new_feeds
+        }
+        joined = {
+            tag: posts for tag, posts in new_feeds.items()
+            if tag not in old_feeds
+        }
+        if left:
+            FeedCounter.change(left, -1)
+        if joined:
+            FeedCounter.change(joined, 1)
+
+
+@receiver(post_save, sender=Post)
+def update_posts_counter_on_save(sender, instance, created, raw, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    if created:
+        PostsCounter.change(instance.author_id, 1)
+    elif previous is not None and (
+        previous['author_id'] != instance.author_id
+    ):
+        PostsCounter.change(previous['author_id'], -1)
+        PostsCounter.change(instance.author_id, 1)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_feeds_on_save(sender, instance, **kwargs):
+    """Сбрасывает кеш лент, куда пост попал и откуда мог уйти.
+
+    Время изменения лент пишется в той же транзакции, а теги кеша
+    сбрасываются после ее фиксации: иначе параллельный запрос мог бы
+    сохранить под новой версией тега старые данные.
+    """
+    tags = set(post_feed_tags(instance.group_id, instance.author_id))
+    previous = getattr(instance, '_previous', None)
+    if previous is not None:
+        tags.update(
+            post_feed_tags(previous['group_id'], previous['author_id'])
+        )
+    FeedVersion.touch(tags, instance.modified)
+    transaction.on_commit(lambda: invalidate_tags(tags))
+
+
+@receiver(post_save, sender=Post)
+def schedule_fan_out_on_save(sender, instance, created, raw, **kwargs):
+    """Ставит рассылку поста по лентам подписок.
+
+    Пост, перенесенный в другую группу, рассылается подписчикам новой
+    группы; из лент подписчиков прежней группы он не убирается.
+    """
+    previous = getattr(instance, '_previous', None)
+    if raw or not (created or (
+        previous is not None and previous['group_id'] != instance.group_id
+    )):
+        return
+    TimelineTask.objects.create(action=TimelineTask.FAN_OUT, post=instance)
+
+
+@receiver(post_delete, sender=Post)
+def update_counts_on_delete(sender, instance, **kwargs):
+    FeedCounter.change(feed_posts(instance.group_id, instance.author_id), -1)
+
+
+@receiver(post_delete, sender=Post)
+def update_posts_counter_on_delete(sender, instance, **kwargs):
+    PostsCounter.change(instance.author_id, -1)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_feeds_on_delete(sender, instance, **kwargs):
+    tags = post_feed_tags(instance.group_id, instance.author_id)
+    FeedVersion.touch(tags)
+    transaction.on_commit(lambda: invalidate_tags(tags))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_feeds_on_group_change(sender, instance, **kwargs):
+    """Название группы выводится в любой ленте, сбрасываем все."""
+    FeedVersion.touch([ALL_FEEDS_TAG])
+    transaction.on_commit(lambda: invalidate_tags([ALL_FEEDS_TAG]))
+
+
+def posts_bulk_created(posts):
+    """Обработка постов, созданных через bulk_create.
+
+    bulk_create не отправляет post_save, поэтому счетчики авторов и лент
+    и время изменения лент обновляются здесь, а теги лент в кеше —
+    после фиксации транзакции.
+    """
+    per_author = Counter(post.author_id for post in posts)
+    for author_id, delta in per_author.items():
+        PostsCounter.change(author_id, delta)
+    per_feed = Counter()
+    feeds = {}
+    for post in posts:
+        post_feeds = feed_posts(post.group_id, post.author_id)
+        per_feed.update(post_feeds.keys())
+        feeds.update(post_feeds)
+    for tag, delta in per_feed.items():
+        FeedCounter.change({tag: feeds[tag]}, delta)
+    tags = set(feeds)
+    FeedVersion.touch(tags)
+    transaction.on_commit(lambda: invalidate_tags(tags))
@@ -0,0 +1,42 @@
+from django import template
+from django.urls import reverse
+
+from posts.models import Follow, GroupFollow
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def follow_state(context):
+    """Подписка посетителя на автора или группу открытой страницы.
+
+    Тег выводится в персональном фрагменте, который отрисовывается и
+    для страницы из кеша, поэтому автор или группа берутся из адреса
+    страницы, а подписка проверяется одним запросом.
+    """
+    # Анонимное попадание в кеш страниц отрисовывается до
+    # AuthenticationMiddleware: пользователь есть только в контексте
+    user = context.get('user')
+    match = context['request'].resolver_match
+    if user is None or not user.is_authenticated or match is None:
+        return None
+    if match.view_name == 'posts:profile':
+        username = match.kwargs['username']
+        if username == user.username:
+            return None
+        following = Follow.objects.filter(
+            user=user, author__username=username,
+        ).exists()
+        names = ('posts:profile_unfollow', 'posts:profile_follow')
+    elif match.view_name == 'posts:group_list':
+        following = GroupFollow.objects.filter(
+            user=user, group__slug=match.kwargs['slug'],
+        ).exists()
+        names = ('posts:group_unfollow', 'posts:group_follow')
+    else:
+        return None
+    return {
+        'following': following,
+        'url': reverse(names[0] if following else names[1],
+                       kwargs=match.kwargs),
+    }
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.signals import posts_bulk_created
+
+COUNT_FOR_POSTS = 250
+PER_PAGE = 100
+
+User = get_user_model()
+
+
+class PostAdminTest(TestCase):
+    """Тестирование списка постов в админке."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password',
+        )
+        Group.objects.bulk_create([
+            Group(
+                title=f'Группа {number}',
+                slug=f'admin-slug-{number}',
+                description='Описание группы',
+            )
+            for number in range(5)
+        ])
+        group = Group.objects.first()
+        posts_bulk_created(Post.objects.bulk_create([
+            Post(text=f'Пост {number}', author=cls.admin, group=group)
+            for number in range(COUNT_FOR_POSTS)
+        ]))
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def changelist(self, params=None):
+        return self.client.get(self.url, params or {}).context['cl']
+
+    def test_queries_do_not_depend_on_rows(self):
+        """Число запросов не растет с числом строк на странице."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        post_queries = [
+            query['sql'] for query in queries
+            if 'FROM "posts_group"' in query['sql']
+            or 'FROM "auth_user"' in query['sql']
+        ]
+        # Пользователь сессии и один запрос групп для всех строк
+        self.assertEqual(len(post_queries), 2)
+
+    def test_keyset_walk_returns_every_post_once(self):
+        """Переход по ссылке «Следующая» обходит все посты ровно раз."""
+        posts = []
+        params = {}
+        while True:
+            cl = self.changelist(params)
+            posts.extend(cl.result_list)
+            if not cl.keyset_page.has_next():
+                break
+            params = {'cursor': cl.keyset_page.next_cursor}
+        self.assertEqual(
+            posts, list(Post.objects.order_by('-pub_date', '-id')),
+        )
+
+    def test_ordering_by_column_uses_page_numbers(self):
+        """Сортировка по столбцу возвращает обычную пагинацию."""
+        cl = self.changelist({'o': '1', 'p': '1'})
+        self.assertIsNone(cl.keyset_page)
+        self.assertEqual(len(cl.result_list), PER_PAGE)
+
+    @override_settings(ADMIN_COUNT_LIMIT=COUNT_FOR_POSTS // 2)
+    def test_count_is_estimated_above_limit(self):
+        """Количество сверх предела выводится как оценка."""
+        response = self.client.get(self.url, {'q': 'пост'})
+        self.assertTrue(response.context['cl'].count_estimated)
+        self.assertContains(response, f'более {COUNT_FOR_POSTS // 2}')
+        cl = self.changelist({'q': '249'})
+        self.assertFalse(cl.count_estimated)
+        self.assertEqual(cl.result_count, 1)
+
+    def test_list_editable_saves_group(self):
+        """Группа меняется прямо из списка постов."""
+        post = Post.objects.order_by('-pub_date', '-id').first()
+        group = Group.objects.last()
+        self.client.post(self.url, {
+            'form-TOTAL_FORMS': 1,
+            'form-INITIAL_FORMS': 1,
+            'form-0-id': post.pk,
+            'form-0-group': group.pk,
+            '_save': 'Save',
+        })
+        post.refresh_from_db()
+        self.assertEqual(post.group, group)
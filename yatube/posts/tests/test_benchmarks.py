@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.benchmarks import compare_reports, profile_request
+from posts.models import Post
+
+User = get_user_model()
+
+
+class BenchmarkToolsTest(TestCase):
+    """Тестирование инструментов замера view-функций."""
+
+    def test_profile_request_counts_queries_and_render(self):
+        """Замер считает запросы к базе и время отрисовки шаблонов."""
+        author = User.objects.create(username='Author')
+        post = Post.objects.create(text='Пост', author=author)
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        result = profile_request(lambda: self.client.get(url), repeat=2)
+        self.assertGreater(result['queries'], 0)
+        self.assertGreater(result['render_ms'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+    def test_compare_reports_finds_regressions(self):
+        """Рост p95 сверх допуска и рост числа запросов — регрессии."""
+        baseline = {'1000': {
+            'index': {'p95_ms': 10, 'queries': 3},
+            'profile': {'p95_ms': 10, 'queries': 3},
+        }}
+        report = {'1000': {
+            'index': {'p95_ms': 11, 'queries': 3},
+            'profile': {'p95_ms': 13, 'queries': 4},
+        }}
+        regressions = compare_reports(report, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all('profile' in line for line in regressions))
@@ -0,0 +1,361 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from core.cache import FileCache
+from posts.cache import feed_tag, get_tag_versions, invalidate_tags
+from posts.models import FeedVersion, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_CACHE_TIMEOUT=60)
+class FeedFragmentCacheTest(TransactionTestCase):
+    """Тестирование кеша отрисованных страниц лент.
+
+    Теги сбрасываются после фиксации транзакции, поэтому тесты кеша
+    выполняются без общей транзакции TestCase.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='Author')
+        self.group = Group.objects.create(
+            title='Первая группа',
+            slug='first-slug',
+            description='Описание группы',
+        )
+        self.other_group = Group.objects.create(
+            title='Вторая группа',
+            slug='second-slug',
+            description='Описание группы',
+        )
+        self.post = Post.objects.create(
+            text='Закешированный пост',
+            author=self.author,
+            group=self.group,
+        )
+        self.author_client = self.client_class()
+        self.author_client.force_login(self.author)
+        self.feeds = {
+            'index': reverse('posts:index'),
+            'group': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug},
+            ),
+            'other_group': reverse(
+                'posts:group_list', kwargs={'slug': self.other_group.slug},
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': self.author},
+            ),
+        }
+
+    def test_cached_index_runs_one_query(self):
+        """Повторный запрос главной страницы читает из базы только
+        время изменения ленты."""
+        self.client.get(self.feeds['index'])
+        with self.assertNumQueries(1):
+            response = self.client.get(self.feeds['index'])
+        self.assertContains(response, 'Закешированный пост')
+
+    def test_new_post_invalidates_its_feeds(self):
+        """Новый пост сразу виден во всех своих лентах."""
+        for url in self.feeds.values():
+            self.client.get(url)
+        self.author_client.post(reverse('posts:post_create'), {
+            'text': 'Новый пост',
+            'group': self.group.pk,
+        })
+        for name in ('index', 'group', 'profile'):
+            with self.subTest(feed=name):
+                response = self.client.get(self.feeds[name])
+                self.assertContains(response, 'Новый пост')
+
+    def test_group_change_invalidates_both_groups(self):
+        """Перенос поста в другую группу обновляет обе ленты групп."""
+        for url in self.feeds.values():
+            self.client.get(url)
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Перенесенный пост', 'group': self.other_group.pk},
+        )
+        response = self.client.get(self.feeds['group'])
+        self.assertNotContains(response, 'Перенесенный пост')
+        self.assertNotContains(response, 'Закешированный пост')
+        response = self.client.get(self.feeds['other_group'])
+        self.assertContains(response, 'Перенесенный пост')
+
+    def test_tags_are_invalidated_after_commit(self):
+        """До фиксации транзакции версия тега ленты не меняется."""
+        tags = [feed_tag(group_id=self.group.pk)]
+        versions = get_tag_versions(tags)
+        with transaction.atomic():
+            Post.objects.create(
+                text='Новый пост', author=self.author, group=self.group,
+            )
+            self.assertEqual(get_tag_versions(tags), versions)
+        self.assertNotEqual(get_tag_versions(tags), versions)
+
+    def test_cache_is_shared_between_processes(self):
+        """Сброс тегов виден кешу другого процесса."""
+        config = settings.CACHES['default']
+        other_process = FileCache(config['LOCATION'], config)
+        tags = [feed_tag()]
+        invalidate_tags(tags)
+        self.assertEqual(
+            other_process.get_many(['posts:tag:feed:index']),
+            {'posts:tag:feed:index': get_tag_versions(tags)[0]},
+        )
+
+    def test_delete_invalidates_feeds(self):
+        """Удаленный пост пропадает из лент."""
+        for url in self.feeds.values():
+            self.client.get(url)
+        self.post.delete()
+        for name in ('index', 'group', 'profile'):
+            with self.subTest(feed=name):
+                response = self.client.get(self.feeds[name])
+                self.assertNotContains(response, 'Закешированный пост')
+
+    def test_group_rename_invalidates_index(self):
+        """Новое название группы появляется на главной странице."""
+        self.client.get(self.feeds['index'])
+        self.group.title = 'Переименованная группа'
+        self.group.save()
+        response = self.client.get(self.feeds['index'])
+        self.assertContains(response, 'Переименованная группа')
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=60)
+class FeedPageCacheTest(TransactionTestCase):
+    """Тестирование кеша целых страниц лент."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='Author')
+        self.other_author = User.objects.create(username='OtherAuthor')
+        self.group = Group.objects.create(
+            title='Группа',
+            slug='group-slug',
+            description='Описание группы',
+        )
+        Post.objects.create(
+            text='Пост автора', author=self.author, group=self.group,
+        )
+        self.profile_url = reverse(
+            'posts:profile', kwargs={'username': self.author},
+        )
+        self.other_profile_url = reverse(
+            'posts:profile', kwargs={'username': self.other_author},
+        )
+
+    def test_anonymous_hit_skips_view(self):
+        """Повторный анонимный запрос отдается без view и базы."""
+        first = self.client.get(self.profile_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.profile_url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response.content, first.content)
+        self.assertEqual(
+            response['X-Frame-Options'], first['X-Frame-Options'],
+        )
+
+    def test_cached_page_answers_conditional_get(self):
+        """Закешированная страница отвечает 304 без обращения к базе."""
+        etag = self.client.get(self.profile_url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.profile_url, HTTP_IF_NONE_MATCH=etag,
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_pages_are_keyed_by_page_number(self):
+        """Разные страницы ленты кешируются отдельно."""
+        self.client.get(self.profile_url)
+        response = self.client.get(self.profile_url, {'page': 2})
+        self.assertFalse(response.has_header('X-Page-Cache'))
+
+    def test_authorized_user_gets_own_menu_in_shared_page(self):
+        """Авторизованный пользователь получает общую страницу из кеша
+        со своим персональным меню."""
+        self.client.get(self.profile_url)
+        self.client.force_login(self.author)
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Пользователь: Author')
+        self.assertNotContains(response, 'Регистрация')
+
+    def test_personal_menu_does_not_leak_to_anonymous(self):
+        """Страница, закешированная для пользователя, не выдает его
+        меню анонимному посетителю."""
+        self.client.force_login(self.author)
+        self.client.get(self.profile_url)
+        response = self.client_class().get(self.profile_url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertNotContains(response, 'Пользователь: Author')
+        self.assertContains(response, 'Регистрация')
+
+    def test_new_post_purges_only_affected_pages(self):
+        """Новый пост сбрасывает страницы своего автора, но не чужие."""
+        self.client.get(self.profile_url)
+        self.client.get(self.other_profile_url)
+        Post.objects.create(text='Свежий пост', author=self.author)
+        response = self.client.get(self.profile_url)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'Свежий пост')
+        response = self.client.get(self.other_profile_url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    def test_follow_changes_cached_page_validators(self):
+        """Подписка меняет валидаторы страницы из кеша у подписчика."""
+        self.client.get(self.profile_url)
+        self.client.force_login(self.other_author)
+        etag = self.client.get(self.profile_url)['ETag']
+        self.client.post(reverse(
+            'posts:profile_follow', kwargs={'username': self.author},
+        ))
+        response = self.client.get(self.profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Отписаться')
+
+
+class ConditionalGetTest(TransactionTestCase):
+    """Тестирование условных GET-запросов к лентам и постам."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='Author')
+        self.group = Group.objects.create(
+            title='Группа',
+            slug='group-slug',
+            description='Описание группы',
+        )
+        self.post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group,
+        )
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk},
+        )
+        self.group_url = reverse(
+            'posts:group_list', kwargs={'slug': self.group.slug},
+        )
+
+    def test_unchanged_pages_return_not_modified(self):
+        """Совпавший ETag дает 304 не более чем за два запроса к базе:
+        поиск объекта страницы и время ее изменения."""
+        urls = {
+            reverse('posts:index'): 1,
+            self.group_url: 2,
+            reverse('posts:profile', kwargs={'username': self.author}): 2,
+            self.detail_url: 2,
+        }
+        for url, queries in urls.items():
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_if_modified_since_returns_not_modified(self):
+        """Неизмененная страница отвечает 304 на If-Modified-Since."""
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_changes_produce_new_etag(self):
+        """Правка поста и новый пост в группе меняют ETag."""
+        detail_etag = self.client.get(self.detail_url)['ETag']
+        group_etag = self.client.get(self.group_url)['ETag']
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        Post.objects.create(text='Еще пост', author=self.author,
+                            group=self.group)
+        response = self.client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=detail_etag,
+        )
+        self.assertContains(response, 'Исправленный пост')
+        response = self.client.get(
+            self.group_url, HTTP_IF_NONE_MATCH=group_etag,
+        )
+        self.assertContains(response, 'Еще пост')
+
+    def test_last_modified_is_time_of_change(self):
+        """Last-Modified — время изменения поста, записанное в базу."""
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.post.refresh_from_db()
+        response = self.client.get(self.detail_url)
+        self.assertEqual(
+            response['Last-Modified'],
+            http_date(self.post.modified.timestamp()),
+        )
+
+    def test_posts_do_not_leave_versions(self):
+        """Время изменения поста хранится в посте: удаление поста не
+        оставляет строк FeedVersion."""
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.post.delete()
+        self.assertFalse(
+            FeedVersion.objects.filter(tag__startswith='post:').exists()
+        )
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_validators_do_not_depend_on_cache(self):
+        """Валидаторы одинаковы у процессов с разным содержимым кеша."""
+        etag = self.client.get(self.group_url)['ETag']
+        cache.clear()
+        response = self.client.get(self.group_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_rolled_back_change_keeps_etag(self):
+        """Откаченное изменение не меняет ETag."""
+        etag = self.client.get(self.detail_url)['ETag']
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.post.text = 'Откаченная правка'
+            self.post.save()
+            raise RuntimeError
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_etag_depends_on_visitor(self):
+        """Разные посетители получают разные ETag одной страницы."""
+        anonymous_etag = self.client.get(self.detail_url)['ETag']
+        self.client.force_login(self.author)
+        response = self.client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=anonymous_etag,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Редактировать пост')
+
+    def test_follow_changes_etag(self):
+        """Подписка и отписка меняют ETag страниц с кнопкой подписки."""
+        follower = User.objects.create(username='Follower')
+        self.client.force_login(follower)
+        pages = (
+            (self.group_url, 'posts:group_follow', 'posts:group_unfollow',
+             {'slug': self.group.slug}),
+            (reverse('posts:profile', kwargs={'username': self.author}),
+             'posts:profile_follow', 'posts:profile_unfollow',
+             {'username': self.author}),
+        )
+        for url, follow, unfollow, kwargs in pages:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.client.post(reverse(follow, kwargs=kwargs))
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Отписаться')
+                etag = response['ETag']
+                self.client.post(reverse(unfollow, kwargs=kwargs))
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Подписаться')
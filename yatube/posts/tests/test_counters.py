@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post, PostsCounter
+
+User = get_user_model()
+
+
+class PostsCounterTest(TestCase):
+    """Тестирование денормализованного счетчика постов автора."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.other_author = User.objects.create(username='OtherAuthor')
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def counter(self, author):
+        return PostsCounter.for_author(
+            User.objects.select_related('posts_counter').get(pk=author.pk)
+        )
+
+    def test_counter_follows_create_and_delete(self):
+        """Счетчик меняется при создании, удалении и массовом удалении."""
+        self.client.post(reverse('posts:post_create'), {'text': 'Пост'})
+        for _ in range(3):
+            Post.objects.create(text='Пост', author=self.author)
+        self.assertEqual(self.counter(self.author), 4)
+        Post.objects.filter(author=self.author).first().delete()
+        self.assertEqual(self.counter(self.author), 3)
+        Post.objects.filter(author=self.author).delete()
+        self.assertEqual(self.counter(self.author), 0)
+
+    def test_counter_follows_author_change(self):
+        """Смена автора поста переносит его в счетчик нового автора."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        post.author = self.other_author
+        post.save()
+        self.assertEqual(self.counter(self.author), 0)
+        self.assertEqual(self.counter(self.other_author), 1)
+
+    def test_pages_show_counter_without_count_query(self):
+        """Страницы поста и профиля берут количество постов из счетчика."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        PostsCounter.objects.filter(author=self.author).update(posts_count=7)
+        urls = [
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.context['count_posts'], 7)
+
+    def test_recount_repairs_counters(self):
+        """Команда recount_posts исправляет разошедшиеся счетчики."""
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.author) for _ in range(5)
+        )
+        Post.objects.create(text='Пост', author=self.other_author)
+        PostsCounter.objects.filter(author=self.other_author).update(
+            posts_count=10,
+        )
+        out = StringIO()
+        call_command('recount_posts', batch_size=1, stdout=out)
+        self.assertIn('исправлено счетчиков: 2', out.getvalue())
+        self.assertEqual(self.counter(self.author), 5)
+        self.assertEqual(self.counter(self.other_author), 1)
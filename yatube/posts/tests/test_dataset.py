@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from posts.models import Group, Post, PostsCounter
+
+User = get_user_model()
+
+
+class SeedCommandTest(TestCase):
+    """Тестирование генератора синтетических данных."""
+
+    def seed(self, **options):
+        call_command('seed', stdout=StringIO(), seed=1, **options)
+
+    def test_seed_creates_skewed_dataset(self):
+        """Создается заданное количество строк, первый автор —
+        самый плодовитый, счетчики авторов совпадают с постами."""
+        self.seed(users=20, groups=5, posts=2000, batch_size=500)
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 2000)
+        per_author = dict(
+            Post.objects.order_by().values('author')
+            .annotate(posts_count=Count('id'))
+            .values_list('author', 'posts_count')
+        )
+        top_author = User.objects.order_by('pk').first().pk
+        self.assertEqual(per_author[top_author], max(per_author.values()))
+        self.assertGreater(per_author[top_author], 2000 / 20 * 2)
+        self.assertEqual(
+            dict(PostsCounter.objects.values_list('author', 'posts_count')),
+            per_author,
+        )
+
+    def test_uniform_seed_without_skew(self):
+        """При skew=0 авторы получают посты примерно поровну."""
+        self.seed(users=4, groups=2, posts=4000, skew=0)
+        counts = Post.objects.order_by().values('author').annotate(
+            posts_count=Count('id'),
+        ).values_list('posts_count', flat=True)
+        self.assertLess(max(counts) - min(counts), 400)
+
+    def test_posts_without_users_are_rejected(self):
+        """Посты без пользователей не создаются: команда сообщает ошибку."""
+        with self.assertRaises(CommandError):
+            self.seed(users=0, groups=2, posts=10)
+        self.assertFalse(Group.objects.exists())
+        self.seed(users=0, groups=2, posts=0)
+        self.assertEqual(Group.objects.count(), 2)
@@ -0,0 +1,70 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.export import export_rows
+from posts.models import Group, Post
+
+COUNT_FOR_POSTS = 25
+
+User = get_user_model()
+
+
+class ExportPostsTest(TestCase):
+    """Тестирование потоковой выгрузки постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.staff = User.objects.create(username='Staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='export-slug',
+            description='Описание группы',
+        )
+        Post.objects.bulk_create([
+            Post(
+                text=f'Пост {number}',
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(COUNT_FOR_POSTS)
+        ])
+
+    def test_rows_are_fetched_by_chunks(self):
+        """Таблица читается частями, каждая одним запросом."""
+        with self.assertNumQueries(COUNT_FOR_POSTS // 10 + 1):
+            rows = list(export_rows(Post.objects.all(), chunk_size=10))
+        self.assertEqual(
+            [row['id'] for row in rows],
+            list(Post.objects.order_by('id').values_list('id', flat=True)),
+        )
+
+    def test_command_exports_filtered_jsonl(self):
+        """Команда выгружает посты группы с username и slug."""
+        out = StringIO()
+        call_command('export_posts', group='export-slug', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), COUNT_FOR_POSTS // 2)
+        self.assertEqual(rows[0]['author'], 'Author')
+        self.assertEqual(rows[0]['group'], 'export-slug')
+
+    def test_endpoint_streams_csv_for_staff_only(self):
+        """Выгрузка доступна только сотрудникам и отдается потоком."""
+        url = reverse('posts:export')
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get(url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), COUNT_FOR_POSTS)
+        bad = self.client.get(url, {'since': 'вчера'})
+        self.assertEqual(bad.status_code, 400)
@@ -0,0 +1,145 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from posts.cache import count_key, get_count
+from posts.models import Group, Post, PostsCounter
+
+User = get_user_model()
+
+
+class ImportPostsTest(TestCase):
+    """Тестирование команды import_posts."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='import-slug',
+            description='Описание группы',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_jsonl(self, records):
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as source:
+            for record in records:
+                source.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def call(self, *args, **options):
+        call_command('import_posts', *args, stdout=StringIO(), **options)
+
+    def test_import_keeps_fields_and_counters(self):
+        """Посты импортируются с датой, группой и обновленными счетчиками."""
+        path = self.write_jsonl([
+            {
+                'text': f'Пост {number}',
+                'author': 'Author',
+                'group': 'import-slug',
+                'pub_date': f'2020-01-{number + 1:02d}T10:00:00',
+            }
+            for number in range(5)
+        ])
+        self.call(path, batch_size=2)
+        self.assertEqual(
+            Post.objects.filter(author=self.author, group=self.group).count(),
+            5,
+        )
+        self.assertEqual(
+            Post.objects.order_by('pub_date').first().pub_date.year, 2020,
+        )
+        self.assertEqual(
+            PostsCounter.objects.get(author=self.author).posts_count, 5,
+        )
+
+    def test_invalid_records_are_skipped(self):
+        """Записи без текста, с неизвестным автором или группой
+        пропускаются, а с --create-authors автор создается."""
+        path = self.write_jsonl([
+            {'text': '', 'author': 'Author'},
+            {'text': 'Пост', 'author': 'Stranger'},
+            {'text': 'Пост', 'author': 'Author', 'group': 'missing'},
+            {'text': 'Пост', 'author': 'Author', 'pub_date': 'вчера'},
+            {'text': 'Пост', 'author': 'Author'},
+        ])
+        self.call(path)
+        self.assertEqual(Post.objects.count(), 1)
+        self.call(path, create_authors=True)
+        self.assertTrue(
+            Post.objects.filter(author__username='Stranger').exists(),
+        )
+
+    def test_non_object_lines_are_skipped(self):
+        """Строки, которые не являются объектами JSON, пропускаются."""
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write('[]\n"x"\n1\nnull\n{битый json\n')
+            source.write('{"text": "Пост", "author": "Author"}\n')
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertIn(
+            'Импортировано постов: 1, пропущено записей: 5', out.getvalue(),
+        )
+
+    def test_resume_from_checkpoint(self):
+        """Повторный запуск продолжает импорт с сохраненной позиции."""
+        checkpoint = os.path.join(self.directory, 'checkpoint')
+        records = [{'text': f'Пост {number}', 'author': 'Author'}
+                   for number in range(3)]
+        path = self.write_jsonl(records)
+        self.call(path, checkpoint=checkpoint)
+        records.append({'text': 'Новый пост', 'author': 'Author'})
+        self.write_jsonl(records)
+        self.call(path, checkpoint=checkpoint)
+        self.assertEqual(Post.objects.count(), 4)
+        with open(checkpoint) as saved:
+            self.assertEqual(saved.read(), '4')
+
+    def test_import_csv(self):
+        """CSV-файл читается по заголовкам столбцов."""
+        path = os.path.join(self.directory, 'posts.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as source:
+            writer = csv.DictWriter(source, ['text', 'author', 'group'])
+            writer.writeheader()
+            writer.writerow({
+                'text': 'Пост, с запятой', 'author': 'Author', 'group': '',
+            })
+        self.call(path)
+        self.assertEqual(Post.objects.get().text, 'Пост, с запятой')
+
+
+class ImportPostsCacheTest(TransactionTestCase):
+    """Тестирование кеша после импорта: теги сбрасываются после фиксации
+    транзакции, поэтому тест работает с настоящими транзакциями."""
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create(username='Author')
+
+    def test_cached_count_follows_import(self):
+        """Закешированное количество постов учитывает импорт."""
+        get_count(count_key())
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.jsonl', encoding='utf-8',
+        ) as source:
+            source.write('{"text": "Пост", "author": "Author"}\n' * 3)
+            source.flush()
+            call_command('import_posts', source.name, stdout=StringIO())
+        self.assertEqual(get_count(count_key()), 3)
@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.metrics import MetricsRegistry, read_histograms, registry
+from core.slow_queries import clear_slow_queries, worst_queries
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    """Тестирование гистограмм запросов и эндпоинта метрик."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create(username='Staff', is_staff=True)
+        cls.user = User.objects.create(username='User')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            METRICS_DB=os.path.join(directory.name, 'metrics.sqlite3'),
+            METRICS_TOKEN=None,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Наблюдения других тестов не попадают во временный файл
+        registry.pending.clear()
+
+    def test_processes_are_aggregated(self):
+        """Наблюдения разных процессов складываются в общем файле."""
+        for value in (0.003, 0.2):
+            worker = MetricsRegistry()
+            worker.observe('request_duration_seconds', 'posts:index', value)
+            worker.flush()
+        values = read_histograms()['request_duration_seconds', 'posts:index']
+        self.assertEqual(values['count'], 2)
+        self.assertAlmostEqual(values['sum'], 0.203)
+        self.assertEqual(values['0'], 1)
+
+    def test_endpoint_exposes_histograms_by_view(self):
+        """Эндпоинт отдает накопленные гистограммы по имени view."""
+        self.client.force_login(self.staff)
+        self.client.get('/')
+        response = self.client.get('/metrics/')
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        content = response.content.decode()
+        for line in (
+            '# TYPE yatube_request_duration_seconds histogram',
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            'yatube_request_queries_bucket{view="posts:index",le="+Inf"} 1',
+            'yatube_response_size_bytes_count{view="posts:index"} 1',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, content)
+
+    def test_endpoint_access(self):
+        """Эндпоинт закрыт для посетителей, кроме сборщика с токеном."""
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(
+            self.client.get(
+                '/metrics/', HTTP_AUTHORIZATION='Bearer ',
+            ).status_code,
+            403,
+        )
+        with self.settings(METRICS_TOKEN='secret'):
+            for header, status in (
+                ('Bearer wrong', 403),
+                ('Bearer secret', 200),
+            ):
+                with self.subTest(header=header):
+                    response = self.client.get(
+                        '/metrics/', HTTP_AUTHORIZATION=header,
+                    )
+                    self.assertEqual(response.status_code, status)
+
+
+class SlowQueryLogTest(TestCase):
+    """Тестирование журнала медленных запросов."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            METRICS_DB=os.path.join(directory.name, 'metrics.sqlite3'),
+            SLOW_QUERY_MS=0,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        clear_slow_queries()
+
+    def test_slow_query_is_logged_with_plan_once(self):
+        """Запрос записывается с источником и планом, лог — раз на форму."""
+        with self.assertLogs('core.slow_queries') as logs:
+            self.client.get('/')
+            self.client.get('/')
+        records = [json.loads(record.getMessage()) for record in logs.records]
+        feed = [
+            record for record in records
+            if record['origin'] == 'posts:index'
+            and 'FROM "posts_post"' in record['sql']
+        ]
+        self.assertEqual(len(feed), len({record['sql'] for record in feed}))
+        self.assertTrue(any(record['plan'] for record in feed))
+        rows = worst_queries(limit=100, origin='posts:index')
+        self.assertTrue(all(row[4] == 2 for row in rows))
+
+    def test_report_command(self):
+        """Команда slow_queries выводит худшие запросы с планом."""
+        with self.assertLogs('core.slow_queries'):
+            self.client.get('/')
+        out = StringIO()
+        call_command('slow_queries', origin='posts:index', stdout=out)
+        self.assertIn('posts:index: 1 раз', out.getvalue())
+        self.assertIn('план:', out.getvalue())
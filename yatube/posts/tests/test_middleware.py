@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import pstats
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connection
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+from django.urls import include, path
+
+from core.middleware import NPlusOneDetected
+from core.queries import RepeatedQueries
+from posts.models import Post
+
+User = get_user_model()
+
+
+def lazy_authors(request):
+    names = [post.author.username for post in Post.objects.all()]
+    return HttpResponse(', '.join(names))
+
+
+urlpatterns = [
+    path('lazy-authors/', lazy_authors),
+    path('', include('yatube.urls')),
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    NPLUSONE_SAMPLE_RATE=1.0,
+    NPLUSONE_RAISE=True,
+)
+class NPlusOneMiddlewareTest(TestCase):
+    """Тестирование поиска N+1 запросов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Post.objects.bulk_create(
+            Post(text='Пост', author=User.objects.create(username=f'u{n}'))
+            for n in range(5)
+        )
+
+    def test_view_loop_is_reported_with_code_line(self):
+        """Запрос в цикле view-функции указывает на строку кода."""
+        with self.assertRaisesMessage(NPlusOneDetected, 'test_middleware.py'):
+            self.client.get('/lazy-authors/')
+
+    def test_template_loop_is_reported_with_template_line(self):
+        """Ленивая загрузка в шаблоне указывает на строку шаблона."""
+        queries = RepeatedQueries()
+        page = Paginator(Post.objects.all(), 10).page(1)
+        with connection.execute_wrapper(queries):
+            render_to_string('posts/index.html', {
+                'page_obj': page,
+                'feed_cache_timeout': 0,
+                'feed_cache_key': 'n+1',
+            })
+        [(sql, site, count)] = queries.repeated(3)
+        self.assertEqual(count, 5)
+        self.assertIn('FROM "auth_user"', sql)
+        self.assertIn('posts/index.html:', site)
+
+    @override_settings(NPLUSONE_SAMPLE_RATE=0)
+    def test_sampling_off_skips_detection(self):
+        """Без выборки запросы не проверяются."""
+        self.assertEqual(self.client.get('/lazy-authors/').status_code, 200)
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    """Тестирование заголовка Server-Timing и журнала времени запросов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create(username='Staff', is_staff=True)
+        cls.user = User.objects.create(username='User')
+
+    def test_header_is_sent_to_staff_only(self):
+        """Метрики в заголовке получают только сотрудники."""
+        self.client.force_login(self.user)
+        self.assertFalse(self.client.get('/').has_header('Server-Timing'))
+        self.client.force_login(self.staff)
+        header = self.client.get('/')['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'view;dur=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+
+    def test_request_is_logged_as_json(self):
+        """Каждый запрос записывается в журнал строкой JSON."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            self.client.get('/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['tpl_ms'], 0)
+        self.assertLessEqual(record['view_ms'], record['total_ms'])
+
+    def test_timing_log_has_handler(self):
+        """Настройки LOGGING выводят строки core.timing без префиксов."""
+        logger = logging.getLogger('core.timing')
+        handler = logger.handlers[0]
+        stream = StringIO()
+        previous_stream = handler.setStream(stream)
+        previous_level = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            self.client.get('/')
+        finally:
+            logger.setLevel(previous_level)
+            handler.setStream(previous_stream)
+        self.assertEqual(json.loads(stream.getvalue())['path'], '/')
+
+
+class ProfilerMiddlewareTest(TestCase):
+    """Тестирование профилирования запросов по требованию."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create(username='Staff', is_staff=True)
+        cls.user = User.objects.create(username='User')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(PROFILER_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_cprofile_saves_pstats(self):
+        """cProfile сохраняет статистику с именем view в имени файла."""
+        self.client.force_login(self.staff)
+        response = self.client.get('/?profile=cprofile')
+        name = response['X-Profile']
+        self.assertTrue(name.startswith('posts-index-'))
+        self.assertTrue(name.endswith('.prof'))
+        stats = pstats.Stats(os.path.join(self.directory, name))
+        self.assertTrue(stats.total_calls)
+
+    def test_sampler_saves_collapsed_stacks(self):
+        """Выборочный профилировщик сохраняет свернутые стеки."""
+        self.client.force_login(self.staff)
+        response = self.client.get('/', HTTP_X_PROFILE='sample')
+        name = response['X-Profile']
+        self.assertTrue(name.endswith('.collapsed'))
+        with open(os.path.join(self.directory, name)) as collapsed:
+            for line in collapsed:
+                stack, count = line.rsplit(' ', 1)
+                self.assertIn(';', stack)
+                self.assertGreater(int(count), 0)
+
+    def test_visitors_are_not_profiled(self):
+        """Флаг посетителя, не являющегося сотрудником, игнорируется."""
+        self.client.force_login(self.user)
+        response = self.client.get('/?profile=cprofile')
+        self.assertFalse(response.has_header('X-Profile'))
+        self.assertEqual(os.listdir(self.directory), [])
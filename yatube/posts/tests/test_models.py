@@ -51,3 +51,30 @@ class GroupModelTest(TestCase):
         group = GroupModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, group.__str__())
+
+
+class PostIndexesTest(TestCase):
+    """Тестирование индексов запросов лент."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='Тестовый слаг',
+            description='Тестовое описание',
+        )
+
+    def test_feeds_are_sorted_by_index(self):
+        """Ленты читаются по составным индексам без временной сортировки."""
+        feeds = {
+            'post_pub_date_idx': Post.objects.all(),
+            'post_group_pub_date_idx': Post.objects.filter(group=self.group),
+            'post_author_pub_date_idx': Post.objects.filter(author=self.user),
+        }
+        for index_name, posts in feeds.items():
+            with self.subTest(index=index_name):
+                plan = posts[:10].explain()
+                self.assertIn(index_name, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
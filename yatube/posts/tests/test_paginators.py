@@ -0,0 +1,257 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.cache import count_key
+from posts.models import Group, Post
+from posts.signals import posts_bulk_created
+from posts.utils import CachedCountPaginator, KeysetPaginator
+from yatube.settings import POSTS_COUNT
+
+COUNT_FOR_POSTS = 25
+
+
+@override_settings(POSTS_PAGINATION='keyset')
+class KeysetPaginatorTest(TestCase):
+    """Тестирование курсорной пагинации лент."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()
+        cls.user = User.objects.create(username='KeysetUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='keyset-slug',
+            description='Описание группы',
+        )
+        Post.objects.bulk_create([
+            Post(
+                text=f'Тестовое сообщение - {number}',
+                author=cls.user,
+                group=cls.group,
+            )
+            for number in range(COUNT_FOR_POSTS)
+        ])
+        cls.ordered_posts = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def walk(self, url):
+        """Проходит ленту по курсорам «Следующая» и собирает посты."""
+        posts = []
+        response = self.client.get(url)
+        while True:
+            page = response.context['page_obj']
+            posts.extend(page)
+            if not page.has_next():
+                return posts
+            response = self.client.get(url, {'cursor': page.next_cursor})
+
+    def test_walk_returns_every_post_once(self):
+        """Проход по курсорам возвращает все посты ровно один раз."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(url), self.ordered_posts)
+
+    def test_first_page_contains_ten_records(self):
+        """Первая страница содержит POSTS_COUNT постов и не считает их."""
+        with self.assertNumQueries(1):
+            page = KeysetPaginator(Post.objects.all(), POSTS_COUNT).get_page(
+                None
+            )
+            self.assertEqual(len(page), POSTS_COUNT)
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_new_posts_do_not_shift_next_page(self):
+        """Новый пост не сдвигает уже открытую ленту."""
+        url = reverse('posts:index')
+        first_page = self.client.get(url).context['page_obj']
+        Post.objects.create(text='Свежий пост', author=self.user)
+        second_page = self.client.get(
+            url, {'cursor': first_page.next_cursor},
+        ).context['page_obj']
+        self.assertEqual(
+            list(second_page),
+            self.ordered_posts[POSTS_COUNT:POSTS_COUNT * 2],
+        )
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор «Предыдущая» возвращает ту же страницу, что была до нее."""
+        url = reverse('posts:index')
+        first_page = self.client.get(url).context['page_obj']
+        second_page = self.client.get(
+            url, {'cursor': first_page.next_cursor},
+        ).context['page_obj']
+        back_page = self.client.get(
+            url, {'cursor': second_page.previous_cursor},
+        ).context['page_obj']
+        self.assertEqual(list(back_page), list(first_page))
+        self.assertFalse(back_page.has_previous())
+
+    def test_last_cursor_returns_oldest_posts(self):
+        """Курсор «Последняя» возвращает самые старые посты."""
+        page = self.client.get(reverse('posts:index')).context['page_obj']
+        last_page = self.client.get(
+            reverse('posts:index'), {'cursor': page.last_cursor},
+        ).context['page_obj']
+        self.assertEqual(list(last_page), self.ordered_posts[-POSTS_COUNT:])
+        self.assertFalse(last_page.has_next())
+        self.assertTrue(last_page.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Поврежденный курсор открывает первую страницу."""
+        response = self.client.get(reverse('posts:index'), {'cursor': 'bad'})
+        self.assertEqual(
+            list(response.context['page_obj']),
+            self.ordered_posts[:POSTS_COUNT],
+        )
+
+
+@override_settings(POSTS_PAGINATION='countless')
+class CountlessPaginatorTest(TestCase):
+    """Тестирование пагинации без подсчета записей."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()
+        cls.user = User.objects.create(username='CountlessUser')
+        Post.objects.bulk_create([
+            Post(text=f'Тестовое сообщение - {number}', author=cls.user)
+            for number in range(COUNT_FOR_POSTS)
+        ])
+
+    def test_pages_are_fetched_without_count(self):
+        """Страницы отдаются без COUNT(*) и знают о следующей."""
+        expected = {
+            1: (POSTS_COUNT, True),
+            2: (POSTS_COUNT, True),
+            3: (COUNT_FOR_POSTS - 2 * POSTS_COUNT, False),
+        }
+        for number, (length, has_next) in expected.items():
+            with self.subTest(page=number):
+                response = self.client.get(
+                    reverse('posts:index'), {'page': number},
+                )
+                page = response.context['page_obj']
+                self.assertEqual(len(page), length)
+                self.assertEqual(page.has_next(), has_next)
+                self.assertNotContains(response, 'Последняя')
+
+    def test_out_of_range_page_returns_first_page(self):
+        """Несуществующая страница открывает первую."""
+        response = self.client.get(reverse('posts:index'), {'page': 100})
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+
+@override_settings(POSTS_PAGINATION='cached')
+class CachedCountPaginatorTest(TransactionTestCase):
+    """Тестирование пагинации с количеством записей из кеша.
+
+    Счетчики меняются после фиксации транзакции, поэтому тест выполняется
+    без общей транзакции TestCase.
+    """
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create(username='CachedUser')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='cached-slug',
+            description='Описание группы',
+        )
+        self.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Описание группы',
+        )
+        posts_bulk_created(Post.objects.bulk_create([
+            Post(text='Тестовое сообщение', author=self.user, group=self.group)
+            for _ in range(COUNT_FOR_POSTS)
+        ]))
+
+    def count(self, **scope):
+        posts = Post.objects.filter(**scope)
+        return CachedCountPaginator(
+            posts, POSTS_COUNT, count_key(**scope),
+        ).count
+
+    def test_count_is_served_from_cache(self):
+        """Повторный подсчет не обращается к базе данных."""
+        self.assertEqual(self.count(group=self.group), COUNT_FOR_POSTS)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.count(group=self.group), COUNT_FOR_POSTS)
+
+    def test_count_follows_create_edit_and_delete(self):
+        """Счетчики меняются при создании, переносе и удалении поста."""
+        self.count(), self.count(group=self.group)
+        self.count(group=self.other_group), self.count(author=self.user)
+        post = Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group,
+        )
+        post.group = self.other_group
+        post.save()
+        Post.objects.filter(group=self.group)[0].delete()
+        # Счетчик каждой измененной ленты читается из базы один раз
+        with self.assertNumQueries(4):
+            self.count(), self.count(group=self.group)
+            self.count(group=self.other_group), self.count(author=self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.count(), COUNT_FOR_POSTS)
+            self.assertEqual(self.count(author=self.user), COUNT_FOR_POSTS)
+            self.assertEqual(
+                self.count(group=self.group), COUNT_FOR_POSTS - 1,
+            )
+            self.assertEqual(self.count(group=self.other_group), 1)
+
+    def test_rolled_back_write_keeps_count(self):
+        """Откаченная запись не меняет счетчики в кеше."""
+        self.count()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Post.objects.create(text='Откаченный пост', author=self.user)
+            raise RuntimeError
+        with self.assertNumQueries(0):
+            self.assertEqual(self.count(), COUNT_FOR_POSTS)
+
+
+class PageWindowTest(TestCase):
+    """Тестирование окна ссылок на страницы в paginator.html."""
+
+    def render(self, num_pages, number):
+        paginator = Paginator(range(num_pages * POSTS_COUNT), POSTS_COUNT)
+        return render_to_string(
+            'includes/paginator.html',
+            {'page_obj': paginator.page(number)},
+        )
+
+    def test_link_count_does_not_depend_on_page_count(self):
+        """Количество ссылок не растет вместе с количеством страниц."""
+        small = self.render(100, 50)
+        huge = self.render(20_000, 10_000)
+        self.assertEqual(
+            small.count('page-item'), huge.count('page-item'),
+        )
+        for page in (1, 9_998, 10_002, 20_000):
+            with self.subTest(page=page):
+                self.assertIn(f'?page={page}"', huge)
+        self.assertNotIn('?page=9997"', huge)
+
+    def test_short_feed_shows_every_page(self):
+        """Короткая лента показывает все страницы без пропусков."""
+        html = self.render(5, 1)
+        self.assertNotIn('&hellip;', html)
+        for page in range(2, 6):
+            with self.subTest(page=page):
+                self.assertIn(f'?page={page}"', html)
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.queries import RepeatedQueries, track_queries, wrap_connections
+from core.routers import STICKY_COOKIE
+from posts.middleware import CACHE_HIT_HEADER
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """Тестирование чтения с реплики на копии базы в файле."""
+
+    def setUp(self):
+        self.author = User.objects.create(username='Author', is_staff=True)
+        Post.objects.create(text='Пост на реплике', author=self.author)
+        self.client.force_login(self.author)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'replica.sqlite3')
+        # Реплика — снимок основной базы; дальше она отстает
+        replica = sqlite3.connect(path)
+        connection.ensure_connection()
+        connection.connection.backup(replica)
+        replica.close()
+        connections.databases['replica'] = {
+            **connections.databases['default'], 'NAME': path,
+        }
+        self.addCleanup(self.remove_replica)
+        Post.objects.create(text='Пост только в основной базе',
+                            author=self.author)
+
+    def remove_replica(self):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+
+    def profile_texts(self, response):
+        return [post.text for post in response.context['page_obj']]
+
+    def test_reads_go_to_replica(self):
+        """Страница без записи читается с отстающей реплики."""
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'Author'}),
+        )
+        self.assertEqual(self.profile_texts(response), ['Пост на реплике'])
+
+    def test_read_after_write_goes_to_primary(self):
+        """После записи редирект читается из основной базы."""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'},
+            follow=True,
+        )
+        self.assertIn(STICKY_COOKIE, self.client.cookies)
+        self.assertEqual(len(self.profile_texts(response)), 3)
+
+    def test_replica_queries_are_tracked(self):
+        """Запросы к реплике учитываются счетчиками и поиском N+1."""
+        repeated = RepeatedQueries()
+        with track_queries() as stats, wrap_connections(repeated):
+            for _ in range(3):
+                list(Post.objects.using('replica').all())
+        self.assertEqual(stats['queries'], 3)
+        self.assertEqual(len(repeated.repeated(3)), 1)
+
+    def test_server_timing_counts_replica_reads(self):
+        """Server-Timing считает запросы страницы, прочитанной с реплики."""
+        with track_queries() as stats:
+            response = self.client.get(
+                reverse('posts:profile', kwargs={'username': 'Author'}),
+            )
+        self.assertEqual(self.profile_texts(response), ['Пост на реплике'])
+        self.assertGreater(stats['queries'], 0)
+        self.assertIn(
+            f'queries;desc="{stats["queries"]}"', response['Server-Timing'],
+        )
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_page_cache_miss_reads_primary(self):
+        """Страница, сохраняемая в кеш, читается из основной базы."""
+        cache.clear()
+        self.client.logout()
+        url = reverse('posts:profile', kwargs={'username': 'Author'})
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response[CACHE_HIT_HEADER], 'hit')
+        self.assertContains(response, 'Пост только в основной базе')
+
+    @override_settings(FEED_CACHE_TIMEOUT=60, PAGE_CACHE_TIMEOUT=0)
+    def test_replica_reads_are_not_cached(self):
+        """Фрагмент, прочитанный с отстающей реплики, не попадает в кеш."""
+        cache.clear()
+        url = reverse('posts:profile', kwargs={'username': 'Author'})
+        response = self.client.get(url)
+        self.assertNotContains(response, 'Пост только в основной базе')
+        self.client.cookies[STICKY_COOKIE] = '1'
+        response = self.client.get(url)
+        self.assertContains(response, 'Пост только в основной базе')
@@ -0,0 +1,93 @@
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.search import search_posts
+from yatube.settings import POSTS_COUNT
+
+
+class SearchTest(TestCase):
+    """Тестирование полнотекстового поиска по постам."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()
+        cls.user = User.objects.create(username='SearchUser')
+        cls.other_user = User.objects.create(username='OtherUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='search-slug',
+            description='Описание группы',
+        )
+        cls.relevant = Post.objects.create(
+            text='Ёжик ёжик ёжик в тумане',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.mentioned = Post.objects.create(
+            text='Длинный рассказ про лошадь, туман, реку и одного ёжика',
+            author=cls.other_user,
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query, **params},
+        )
+        return list(response.context['page_obj'])
+
+    def test_results_are_ranked(self):
+        """Более релевантный пост идет первым, префикс тоже находится."""
+        self.assertEqual(
+            list(search_posts('ёжик')), [self.relevant, self.mentioned],
+        )
+        self.assertEqual(list(search_posts('лошад')), [self.mentioned])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при создании, правке и удалении постов."""
+        Post.objects.bulk_create([
+            Post(text='Массовый импорт', author=self.user),
+        ])
+        post = Post.objects.create(text='Черновик', author=self.user)
+        self.assertEqual(search_posts('импорт').count(), 1)
+        post.text = 'Опубликованный текст'
+        post.save()
+        self.assertFalse(search_posts('черновик').exists())
+        self.assertEqual(list(search_posts('опубликованный')), [post])
+        post.delete()
+        self.assertFalse(search_posts('опубликованный').exists())
+
+    def test_filters_by_group_and_author(self):
+        """Поиск сужается группой и автором."""
+        self.assertEqual(
+            self.search('ёжик', group=self.group.slug), [self.relevant],
+        )
+        self.assertEqual(
+            self.search('ёжик', author=self.other_user.username),
+            [self.mentioned],
+        )
+
+    def test_special_characters_do_not_break_query(self):
+        """Операторы и кавычки FTS5 во вводе не вызывают ошибок."""
+        for query in ('"', 'ёжик AND', 'NEAR(', '*', 'туман -"реку'):
+            with self.subTest(query=query):
+                response = self.client.get(
+                    reverse('posts:search'), {'q': query},
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_pagination_keeps_query(self):
+        """Ссылки пагинации сохраняют поисковый запрос."""
+        Post.objects.bulk_create([
+            Post(text=f'Туман номер {number}', author=self.user)
+            for number in range(POSTS_COUNT)
+        ])
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'туман', 'page': 1},
+        )
+        query = urlencode({'q': 'туман'})
+        self.assertContains(response, f'?{query}&amp;page=2')
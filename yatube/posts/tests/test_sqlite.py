@@ -0,0 +1,57 @@
+from django.db import OperationalError, connection, transaction
+from django.test import TransactionTestCase, override_settings
+
+from core.queries import track_queries
+from core.sqlite import write_with_retries
+from posts.models import Group
+
+
+@override_settings(SQLITE_RETRY_DELAY=0)
+class SQLiteTuningTest(TransactionTestCase):
+    """Тестирование настроек SQLite и очереди записи."""
+
+    def test_pragmas_are_applied_to_connection(self):
+        """Новое соединение получает PRAGMA из настроек."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_locked_write_is_retried(self):
+        """Запись, наткнувшаяся на блокировку, повторяется."""
+        attempts = []
+
+        def write():
+            attempts.append(connection.in_atomic_block)
+            if len(attempts) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(write_with_retries(write), 'ok')
+        self.assertEqual(attempts, [True, True, True])
+
+    def test_retries_are_bounded(self):
+        """После SQLITE_WRITE_RETRIES повторов ошибка пробрасывается."""
+        attempts = []
+
+        def write():
+            attempts.append(1)
+            raise OperationalError('database is locked')
+
+        with self.settings(SQLITE_WRITE_RETRIES=2):
+            with self.assertRaises(OperationalError):
+                write_with_retries(write)
+        self.assertEqual(len(attempts), 3)
+
+    def test_transaction_control_is_not_counted(self):
+        """BEGIN и точки сохранения не входят в число запросов."""
+        def write():
+            with transaction.atomic():
+                Group.objects.create(
+                    title='Группа', slug='slug', description='Описание',
+                )
+
+        with track_queries() as stats:
+            write_with_retries(write)
+        # Сохранение группы и время изменения всех лент (обновление
+        # и добавление тега)
+        self.assertEqual(stats['queries'], 3)
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import (Follow, Group, GroupFollow, Post, PostsCounter,
+                          TimelineEntry, TimelineTask)
+from posts.timeline import Timeline, process_tasks
+
+User = get_user_model()
+
+
+@override_settings(TIMELINE_PROLIFIC_POSTS=5, QUERY_BUDGET_STRICT=True)
+class TimelineTest(TestCase):
+    """Тестирование лент подписок, собранных при записи."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='Reader')
+        cls.author = User.objects.create(username='Author')
+        cls.stranger = User.objects.create(username='Stranger')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def timeline_texts(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков автора и группы."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        GroupFollow.objects.create(user=self.stranger, group=self.group)
+        Post.objects.create(text='Пост', author=self.author, group=self.group)
+        Post.objects.create(text='Чужой пост', author=self.stranger)
+        self.assertEqual(process_tasks(), 2)
+        readers = TimelineEntry.objects.values_list(
+            'user__username', flat=True,
+        )
+        self.assertEqual(set(readers), {'Reader', 'Stranger'})
+        self.assertEqual(self.timeline_texts(), ['Пост'])
+
+    def test_prolific_author_is_read_on_open(self):
+        """Посты плодовитого автора не рассылаются, а читаются из ленты
+        автора и сливаются с готовой лентой без повторов."""
+        PostsCounter.objects.create(author=self.author, posts_count=5)
+        Follow.objects.create(user=self.reader, author=self.author)
+        GroupFollow.objects.create(user=self.reader, group=self.group)
+        Post.objects.create(text='Первый', author=self.stranger,
+                            group=self.group)
+        Post.objects.create(text='Второй', author=self.author)
+        Post.objects.create(text='Третий', author=self.author,
+                            group=self.group)
+        process_tasks()
+        self.assertEqual(TimelineEntry.objects.count(), 2)
+        self.assertEqual(self.timeline_texts(), ['Третий', 'Второй', 'Первый'])
+
+    def test_follow_and_unfollow_update_timeline(self):
+        """Подписка добавляет прошлые посты, отписка убирает их, кроме
+        постов групп из подписок."""
+        Post.objects.create(text='Пост автора', author=self.author)
+        Post.objects.create(text='Пост в группе', author=self.author,
+                            group=self.group)
+        GroupFollow.objects.create(user=self.reader, group=self.group)
+        profile = {'username': self.author.username}
+        self.client.post(reverse('posts:profile_follow', kwargs=profile))
+        process_tasks()
+        self.assertEqual(
+            self.timeline_texts(), ['Пост в группе', 'Пост автора'],
+        )
+        self.client.post(reverse('posts:profile_unfollow', kwargs=profile))
+        process_tasks()
+        self.assertEqual(self.timeline_texts(), ['Пост в группе'])
+        self.assertFalse(TimelineTask.objects.exists())
+
+    def test_follow_button_on_profile(self):
+        """На странице автора есть кнопка подписки, у себя — нет."""
+        url = reverse('posts:profile', kwargs={'username': 'Author'})
+        self.assertContains(self.client.get(url), 'Подписаться')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(self.client.get(url), 'Отписаться')
+        self.client.force_login(self.author)
+        self.assertNotContains(self.client.get(url), 'Подписаться')
+
+    def test_timeline_page_uses_index(self):
+        """Страница ленты — один запрос по индексу без сортировки
+        и запрос списка плодовитых авторов, который кешируется."""
+        posts = Timeline(self.reader)
+        with self.assertNumQueries(2):
+            posts[0:11]
+        with self.assertNumQueries(1):
+            posts[10:21]
+        plan = posts.pushed().explain()
+        self.assertIn('timeline_user_pub_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
@@ -113,3 +113,11 @@ class PostURLTests(TestCase):
             with self.subTest(url=url):
                 response = self.authorized_client1.get(url)
                 self.assertTemplateUsed(response, template)
+
+    def test_user_menu_is_personal_and_not_cached(self):
+        """Персональное меню отдается отдельно и не кешируется."""
+        response = self.authorized_client1.get('/auth/menu/')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, f'Пользователь: {self.user1.username}')
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
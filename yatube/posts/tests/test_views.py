@@ -1,9 +1,12 @@
 from django import forms
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
-from django.urls import reverse
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import URLResolver, reverse
 
+from posts import urls
 from posts.models import Group, Post
+from posts.signals import posts_bulk_created
 from yatube.settings import POSTS_COUNT, POSTS_TEST_COUNT
 
 COUNT_FOR_POSTS = 14
@@ -246,3 +249,114 @@ class PaginatorViewsTest(TestCase):
                     len(response.context['page_obj']),
                     POSTS_TEST_COUNT,
                 )
+
+
+@override_settings(QUERY_BUDGET_STRICT=True, NPLUSONE_RAISE=True)
+class QueryBudgetTest(TestCase):
+    """Тестирование бюджетов запросов view-функций: N+1 запросов
+    превышает бюджет и вызывает QueryBudgetExceeded."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        User = get_user_model()
+        cls.authors = User.objects.bulk_create(
+            User(username=f'BudgetUser{number}') for number in range(3)
+        )
+        cls.author = User.objects.get(username='BudgetUser0')
+        Group.objects.bulk_create(
+            Group(
+                title=f'Группа {number}',
+                slug=f'budget-slug-{number}',
+                description='Описание группы',
+            )
+            for number in range(3)
+        )
+        cls.groups = list(Group.objects.all())
+        authors = list(User.objects.filter(username__startswith='Budget'))
+        posts_bulk_created(Post.objects.bulk_create(
+            Post(
+                text=f'Тестовое сообщение - {number}',
+                author=authors[number % len(authors)],
+                group=cls.groups[number % len(cls.groups)],
+            )
+            for number in range(POSTS_COUNT * 2)
+        ))
+        cls.post = Post.objects.filter(author=cls.author).first()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_every_view_has_budget(self):
+        """У каждой view-функции приложения posts есть бюджет."""
+        for pattern in urls.urlpatterns:
+            if isinstance(pattern, URLResolver):
+                continue
+            with self.subTest(view=pattern.name):
+                self.assertTrue(hasattr(pattern.callback, 'query_budget'))
+
+    def test_pages_stay_within_budget(self):
+        """Страницы укладываются в бюджет для любого посетителя."""
+        urls_list = [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', kwargs={'slug': self.groups[0].slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:search') + '?q=сообщение',
+        ]
+        for client in (self.client, self.authorized_client):
+            for url in urls_list:
+                with self.subTest(url=url):
+                    self.assertEqual(client.get(url).status_code, 200)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class FormQueryBudgetTest(TransactionTestCase):
+    """Бюджеты запросов форм постов.
+
+    Запись выполняется в собственной транзакции, как в рабочем
+    окружении, а не внутри общей транзакции TestCase.
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        self.author = User.objects.create(username='BudgetAuthor')
+        self.newcomer = User.objects.create(username='BudgetNewcomer')
+        self.group = Group.objects.create(
+            title='Группа', slug='budget-group', description='Описание',
+        )
+        self.empty_group = Group.objects.create(
+            title='Пустая группа', slug='budget-empty', description='Описание',
+        )
+        self.post = Post.objects.create(
+            text='Тестовое сообщение', author=self.author, group=self.group,
+        )
+        self.client.force_login(self.author)
+
+    def test_forms_stay_within_budget(self):
+        """Создание и редактирование поста укладываются в бюджет."""
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': self.post.pk})
+        self.client.get(reverse('posts:post_create'))
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Новый пост', 'group': self.group.pk},
+        )
+        self.client.get(edit_url)
+        self.client.post(
+            edit_url, {'text': 'Правка', 'group': self.empty_group.pk},
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.group, self.empty_group)
+
+    def test_first_post_stays_within_budget(self):
+        """Первый пост автора в пустой группе создает счетчики его лент
+        и укладывается в бюджет."""
+        self.client.force_login(self.newcomer)
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Первый пост', 'group': self.empty_group.pk},
+        )
+        self.assertTrue(Post.objects.filter(author=self.newcomer).exists())
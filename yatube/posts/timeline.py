@@ -0,0 +1,228 @@
+"""Ленты подписок, собранные при записи (fan-out on write).
+
+Новый пост добавляется в готовые ленты (TimelineEntry) подписчиков
+автора и группы, поэтому страница ленты читается одним запросом по
+индексу (user, -pub_date, -post). Рассылку выполняет отдельный процесс
+(команда timeline_worker) по задачам TimelineTask, которые пишутся в
+одной транзакции с постом или подпиской.
+
+Посты авторов, у которых не меньше TIMELINE_PROLIFIC_POSTS постов, не
+рассылаются: каждый их пост стоил бы записи во все ленты подписчиков.
+Такие посты читаются при открытии ленты запросом по индексу
+(author, -pub_date, -id) и сливаются с готовой лентой. Лента хранит
+не больше TIMELINE_LENGTH постов; лишнее удаляет timeline_worker --trim.
+"""
+import heapq
+from itertools import groupby, islice
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+
+from core.sqlite import write_with_retries
+from posts.models import (Follow, GroupFollow, Post, PostsCounter,
+                          TimelineEntry, TimelineTask)
+
+PULLED_KEY_PREFIX = 'timeline:pulled'
+TRIM_SQL = '''
+    DELETE FROM posts_timelineentry WHERE id IN (
+        SELECT id FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC
+            ) AS position
+            FROM posts_timelineentry
+        ) WHERE position > %s
+    )
+'''
+
+
+def is_prolific(author_id):
+    return PostsCounter.objects.filter(
+        author_id=author_id,
+        posts_count__gte=settings.TIMELINE_PROLIFIC_POSTS,
+    ).exists()
+
+
+def pulled_key(user_id):
+    return f'{PULLED_KEY_PREFIX}:{user_id}'
+
+
+def pulled_author_ids(user_id):
+    """Авторы из подписок, чьи посты читаются при открытии ленты.
+
+    Список кешируется на TIMELINE_PULLED_CACHE_TIMEOUT: автор, только
+    что ставший плодовитым, попадает в ленты после истечения кеша.
+    """
+    author_ids = cache.get(pulled_key(user_id))
+    if author_ids is None:
+        author_ids = list(Follow.objects.filter(
+            user_id=user_id,
+            author__posts_counter__posts_count__gte=(
+                settings.TIMELINE_PROLIFIC_POSTS
+            ),
+        ).values_list('author_id', flat=True))
+        cache.set(
+            pulled_key(user_id),
+            author_ids,
+            settings.TIMELINE_PULLED_CACHE_TIMEOUT,
+        )
+    return author_ids
+
+
+class Timeline:
+    """Лента подписок пользователя для CountlessPaginator.
+
+    Поддерживает только срезы; дальше TIMELINE_LENGTH лента пуста.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def pushed(self):
+        """Посты, разосланные в ленту, в порядке индекса ленты."""
+        # F(): по имени связи сортировка шла бы по полям самого поста
+        return Post.objects.select_related('author', 'group').filter(
+            timeline_entries__user=self.user,
+        ).order_by(
+            '-timeline_entries__pub_date',
+            F('timeline_entries__post').desc(),
+        )
+
+    def __getitem__(self, index):
+        start = index.start or 0
+        stop = min(index.stop, settings.TIMELINE_LENGTH)
+        if start >= stop:
+            return []
+        pushed = self.pushed()
+        author_ids = pulled_author_ids(self.user.pk)
+        if not author_ids:
+            return list(pushed[start:stop])
+        pulled = Post.objects.select_related('author', 'group').filter(
+            author_id__in=author_ids,
+        )
+        merged = heapq.merge(
+            pushed[:stop], pulled[:stop],
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=True,
+        )
+        # Пост плодовитого автора мог попасть в ленту и через группу
+        unique = (
+            next(group) for _, group in groupby(merged, attrgetter('pk'))
+        )
+        return list(islice(unique, start, stop))
+
+
+def add_entries(user_ids, posts):
+    """Добавляет посты (pk, pub_date) в ленты пользователей."""
+    entries = [
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id in user_ids
+        for post_id, pub_date in posts
+    ]
+    write_with_retries(
+        TimelineEntry.objects.bulk_create, entries, ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    """Добавляет пост в ленты подписчиков пачками по
+    TIMELINE_FANOUT_BATCH, каждая пачка — отдельной транзакцией."""
+    readers = GroupFollow.objects.filter(
+        group_id=post.group_id,
+    ).values_list('user_id', flat=True)
+    if not is_prolific(post.author_id):
+        readers = readers.union(
+            Follow.objects.filter(
+                author_id=post.author_id,
+            ).values_list('user_id', flat=True),
+        )
+    readers = readers.iterator()
+    while True:
+        batch = list(islice(readers, settings.TIMELINE_FANOUT_BATCH))
+        if not batch:
+            break
+        add_entries(batch, [(post.pk, post.pub_date)])
+
+
+def recent_posts(posts):
+    return list(
+        posts.values_list('pk', 'pub_date')[:settings.TIMELINE_LENGTH]
+    )
+
+
+def follow_author(user_id, author_id):
+    """Добавляет в ленту последние посты нового автора."""
+    if is_prolific(author_id):
+        cache.delete(pulled_key(user_id))
+        return
+    add_entries(
+        [user_id], recent_posts(Post.objects.filter(author_id=author_id)),
+    )
+
+
+def unfollow_author(user_id, author_id):
+    """Убирает посты автора, кроме постов групп из подписок."""
+    cache.delete(pulled_key(user_id))
+    groups = GroupFollow.objects.filter(user_id=user_id).values('group_id')
+    write_with_retries(
+        TimelineEntry.objects.filter(
+            user_id=user_id, post__author_id=author_id,
+        ).exclude(post__group_id__in=groups).delete,
+    )
+
+
+def follow_group(user_id, group_id):
+    add_entries(
+        [user_id], recent_posts(Post.objects.filter(group_id=group_id)),
+    )
+
+
+def unfollow_group(user_id, group_id):
+    """Убирает посты группы, кроме постов авторов из подписок."""
+    authors = Follow.objects.filter(user_id=user_id).values('author_id')
+    write_with_retries(
+        TimelineEntry.objects.filter(
+            user_id=user_id, post__group_id=group_id,
+        ).exclude(post__author_id__in=authors).delete,
+    )
+
+
+def process_task(task):
+    if task.action == TimelineTask.FAN_OUT:
+        fan_out(task.post)
+    elif task.action == TimelineTask.FOLLOW_AUTHOR:
+        follow_author(task.user_id, task.author_id)
+    elif task.action == TimelineTask.UNFOLLOW_AUTHOR:
+        unfollow_author(task.user_id, task.author_id)
+    elif task.action == TimelineTask.FOLLOW_GROUP:
+        follow_group(task.user_id, task.group_id)
+    elif task.action == TimelineTask.UNFOLLOW_GROUP:
+        unfollow_group(task.user_id, task.group_id)
+
+
+def process_tasks(limit=100):
+    """Выполняет до limit задач по порядку и возвращает их количество.
+
+    Задача удаляется после выполнения; прерванная задача выполнится
+    снова, и повтор ничего не испортит.
+    """
+    tasks = list(
+        TimelineTask.objects.select_related('post').order_by('pk')[:limit]
+    )
+    for task in tasks:
+        process_task(task)
+        write_with_retries(
+            TimelineTask.objects.filter(pk=task.pk).delete,
+        )
+    return len(tasks)
+
+
+def trim_timelines():
+    """Оставляет в каждой ленте TIMELINE_LENGTH последних постов."""
+    def trim():
+        with connection.cursor() as cursor:
+            cursor.execute(TRIM_SQL, [settings.TIMELINE_LENGTH])
+            return cursor.rowcount
+    return write_with_retries(trim)
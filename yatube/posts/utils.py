@@ -1,8 +1,243 @@
 from django.conf import settings
-from django.core.paginator import Paginator
+from django.core import signing
+from django.core.paginator import (EmptyPage, InvalidPage, Page,
+                                   PageNotAnInteger, Paginator)
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import SimpleLazyObject, cached_property
+from django.utils.translation import gettext_lazy as _
 
+from posts.cache import get_count
 
-def get_paginator(request, posts):
-    paginator = Paginator(posts, settings.POSTS_COUNT)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+CURSOR_SALT = 'posts.cursor'
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class KeysetPage(Page):
+    """Страница курсорной пагинации.
+
+    Вместо номера страницы хранит курсоры соседних страниц, поэтому
+    ни количество записей, ни номер страницы не вычисляются.
+    """
+
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        super().__init__(object_list, None, paginator)
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self):
+        return '<Keyset page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @cached_property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(NEXT, self.object_list[-1])
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(PREVIOUS, self.object_list[0])
+
+    @cached_property
+    def last_cursor(self):
+        return self.paginator.encode_cursor(PREVIOUS)
+
+
+class KeysetPaginator(Paginator):
+    """Курсорная пагинация по ключу (pub_date, id).
+
+    Каждая страница выбирается одним запросом `WHERE (pub_date, id) < ключ
+    LIMIT per_page + 1`, поэтому глубокие страницы стоят столько же,
+    сколько первая, а новые посты не сдвигают уже открытую ленту.
+    """
+
+    keyset = True
+    page_kwarg = 'cursor'
+    ordering = ('-pub_date', '-id')
+
+    def encode_cursor(self, direction, post=None):
+        key = None
+        if post is not None:
+            key = (post.pub_date.isoformat(), post.pk)
+        return signing.dumps((direction, key), salt=CURSOR_SALT)
+
+    def decode_cursor(self, cursor):
+        """Возвращает (направление, pub_date, id) или None для
+        повреждённого курсора."""
+        try:
+            direction, key = signing.loads(cursor, salt=CURSOR_SALT)
+            if direction not in (NEXT, PREVIOUS):
+                return None
+            if key is None:
+                return direction, None, None
+            pub_date = parse_datetime(key[0])
+            if pub_date is None:
+                return None
+            return direction, pub_date, int(key[1])
+        except (signing.BadSignature, TypeError, ValueError):
+            return None
+
+    def get_page(self, cursor):
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            decoded = (NEXT, None, None)
+        return self.page(*decoded)
+
+    def keyset_queryset(self, direction=NEXT, pub_date=None, pk=None):
+        """Запрос строк после (или до) ключа в порядке обхода."""
+        posts = self.object_list
+        if direction == NEXT:
+            if pub_date is not None:
+                posts = posts.filter(
+                    Q(pub_date__lt=pub_date) | Q(id__lt=pk),
+                    pub_date__lte=pub_date,
+                )
+            return posts.order_by(*self.ordering)
+        if pub_date is not None:
+            posts = posts.filter(
+                Q(pub_date__gt=pub_date) | Q(id__gt=pk),
+                pub_date__gte=pub_date,
+            )
+        return posts.order_by('pub_date', 'id')
+
+    def page(self, direction=NEXT, pub_date=None, pk=None):
+        posts = self.keyset_queryset(direction, pub_date, pk)
+        rows = list(posts[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not rows and pub_date is not None:
+            # Курсор указывает за край ленты: показываем первую страницу.
+            return self.page()
+        if direction == NEXT:
+            return KeysetPage(rows, self, pub_date is not None, has_more)
+        rows.reverse()
+        return KeysetPage(rows, self, has_more, pub_date is not None)
+
+
+class CountlessPage(Page):
+    """Страница, которая знает о следующей странице без COUNT(*)."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def __repr__(self):
+        return '<Page %s>' % self.number
+
+    def has_next(self):
+        return self._has_next
+
+
+class CountlessPaginator(Paginator):
+    """Пагинация без подсчета записей.
+
+    Выбирает per_page + 1 строк: лишняя строка означает, что следующая
+    страница существует. Общее число страниц неизвестно.
+    """
+
+    countless = True
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_('That page number is not an integer'))
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except InvalidPage:
+            return self.page(1)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        return CountlessPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page,
+        )
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинация, которая берет количество записей из кеша.
+
+    count_key — тег ленты; количество читается из счетчика ленты,
+    который поддерживается сигналами сохранения и удаления постов,
+    поэтому COUNT(*) не выполняется.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        return get_count(self.count_key)
+
+
+class EstimatedCountPaginator(CachedCountPaginator):
+    """Пагинация, которая не считает записи дальше предела.
+
+    Количество по ключу берется из кеша, как в CachedCountPaginator.
+    Без ключа считается не больше limit + 1 строк: если строк больше,
+    количество равно limit и помечается как оценка (estimated).
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, limit=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, count_key, **kwargs)
+        self.limit = limit or settings.ADMIN_COUNT_LIMIT
+        self.estimated = False
+
+    @cached_property
+    def count(self):
+        if self.count_key is not None:
+            return get_count(self.count_key)
+        count = self.object_list.order_by()[:self.limit + 1].count()
+        if count > self.limit:
+            self.estimated = True
+            return self.limit
+        return count
+
+
+PAGINATORS = {
+    'offset': Paginator,
+    'keyset': KeysetPaginator,
+    'countless': CountlessPaginator,
+    'cached': CachedCountPaginator,
+}
+
+
+def get_paginator(request, posts, mode=None, count_key=None):
+    paginator_class = PAGINATORS[mode or settings.POSTS_PAGINATION]
+    if paginator_class is CachedCountPaginator:
+        paginator = paginator_class(posts, settings.POSTS_COUNT, count_key)
+    else:
+        paginator = paginator_class(posts, settings.POSTS_COUNT)
+    page_kwarg = getattr(paginator, 'page_kwarg', 'page')
+    return paginator.get_page(request.GET.get(page_kwarg))
+
+
+def get_lazy_paginator(request, posts, **kwargs):
+    """Страница, запросы которой выполняются при первом обращении.
+
+    Если лента отдана из кеша фрагментов, к базе не будет ни одного
+    запроса: ни за постами, ни за их количеством.
+    """
+    return SimpleLazyObject(lambda: get_paginator(request, posts, **kwargs))
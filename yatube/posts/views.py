@@ -1,63 +1,148 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
 
-from posts.forms import PostForm
-from posts.models import Group, Post
-from posts.utils import get_paginator
+from core.sqlite import serialize_writes
+from posts.cache import count_key, feed_cache_context, feed_tag, follows_tag
+from posts.decorators import (condition_on_tags, group_tags, index_tags,
+                              post_detail_tags, profile_tags, query_budget)
+from posts.export import CONTENT_TYPES, export_posts, filter_posts
+from posts.forms import ExportForm, PostForm
+from posts.models import (FeedVersion, Follow, Group, GroupFollow, Post,
+                          PostsCounter, TimelineTask)
+from posts.search import search_posts
+from posts.timeline import Timeline
+from posts.utils import CountlessPaginator, get_lazy_paginator
 
 User = get_user_model()
 
 
+# Время изменения ленты для валидаторов: еще один запрос
+@query_budget(3)
+@condition_on_tags(index_tags)
 def index(request):
     """Функция отображения главной страницы."""
-    posts = Post.objects.select_related('author').all()
+    posts = Post.objects.select_related('author', 'group')
     context = {
-        'page_obj': get_paginator(request, posts),
+        'page_obj': get_lazy_paginator(request, posts, count_key=count_key()),
+        **feed_cache_context(request, feed_tag()),
     }
     return render(request, 'posts/index.html', context)
 
 
+# Кнопка подписки проверяет подписку пользователя: еще один запрос;
+# еще один — время изменения ленты для валидаторов
+@query_budget(6)
+@condition_on_tags(group_tags, follow_buttons=True)
 def group_posts(request, slug):
     """Функция отображения постов выбраной группы."""
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
-    page = get_paginator(request, posts)
+    posts = Post.objects.filter(group=group).select_related(
+        'author', 'group',
+    )
+    page = get_lazy_paginator(request, posts, count_key=count_key(group=group))
     context = {
         'group': group,
         'posts': posts,
         'page_obj': page,
+        **feed_cache_context(request, feed_tag(group_id=group.pk)),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+# Кнопка подписки проверяет подписку пользователя: еще один запрос;
+# еще один — время изменения ленты для валидаторов
+@query_budget(6)
+@condition_on_tags(profile_tags, follow_buttons=True)
 def profile(request, username):
     """Функция отображения страницы пользователя."""
-    user = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=user)
-    page = get_paginator(request, posts)
+    user = get_object_or_404(
+        User.objects.select_related('posts_counter'),
+        username=username,
+    )
+    posts = Post.objects.filter(author=user).select_related('group')
+    page = get_lazy_paginator(request, posts, count_key=count_key(author=user))
     context = {
         'page_obj': page,
         'author': user,
+        'count_posts': PostsCounter.for_author(user),
         'post': posts,
+        **feed_cache_context(request, feed_tag(author_id=user.pk)),
     }
     return render(request, 'posts/profile.html', context)
 
 
+# Время изменения поста для валидаторов: еще один запрос
+@query_budget(3)
+@condition_on_tags(post_detail_tags)
 def post_detail(request, post_id):
     """Функция отображения одного поста пользователя."""
-    post = get_object_or_404(Post, id=post_id)
-    author = post.author
-    count_posts = author.posts.all().count()
+    post = get_object_or_404(
+        Post.objects.select_related('author__posts_counter', 'group'),
+        id=post_id,
+    )
     context = {
         'post': post,
-        'count_posts': count_posts,
+        'count_posts': PostsCounter.for_author(post.author),
         'user': request.user,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(3)
+def search(request):
+    """Функция полнотекстового поиска по постам."""
+    query = request.GET.get('q', '').strip()
+    group = request.GET.get('group', '')
+    author = request.GET.get('author', '')
+    posts = Post.objects.select_related('author', 'group')
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'groups': Group.objects.order_by('title'),
+        'page_obj': get_lazy_paginator(
+            request, search_posts(query, posts), mode='offset',
+        ),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@query_budget(0)
+@staff_member_required
+def export(request):
+    """Функция потоковой выгрузки постов для сотрудников."""
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    params = form.cleaned_data
+    file_format = params.pop('format')
+    response = StreamingHttpResponse(
+        export_posts(filter_posts(**params), file_format),
+        content_type=CONTENT_TYPES[file_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{file_format}"'
+    )
+    return response
+
+
+# Первый пост автора создает его счетчик постов: еще пять запросов;
+# еще один — задача рассылки поста по лентам подписчиков; еще два —
+# время изменения лент (обновление и добавление новых тегов); до пяти —
+# счетчики постов лент (обновление, а для первого поста автора или
+# группы — выборка, подсчет постов новых лент и их добавление)
+@query_budget(15)
 @login_required
+@serialize_writes
 def post_create(request):
     """Функция создания нового поста пользователя."""
     form = PostForm(request.POST or None)
@@ -73,10 +158,16 @@ def post_create(request):
     return render(request, 'posts/post_create.html', context)
 
 
+# Перенос поста в другую группу ставит задачу рассылки; еще два
+# запроса — время изменения лент (обновление и добавление новых тегов)
+# и еще два — счетчики постов покинутой и новой лент (для первого поста
+# группы счетчик ее ленты создается: выборка, подсчет постов и добавление)
+@query_budget(13)
 @login_required
+@serialize_writes
 def post_edit(request, post_id):
     edit_post = get_object_or_404(Post, id=post_id)
-    if request.user != edit_post.author:
+    if request.user.pk != edit_post.author_id:
         return redirect('posts:post_detail', post_id)
     form = PostForm(request.POST or None, instance=edit_post)
     if form.is_valid() and request.method == 'POST':
@@ -88,3 +179,97 @@ def post_edit(request, post_id):
         'is_edit': True,
     }
     return render(request, 'posts/post_create.html', context)
+
+
+@query_budget(3)
+@login_required
+def follow_index(request):
+    """Лента постов авторов и групп, на которые подписан пользователь."""
+    paginator = CountlessPaginator(
+        Timeline(request.user), settings.POSTS_COUNT,
+    )
+    context = {
+        'page_obj': paginator.get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+def change_follow(model, action, **lookup):
+    """Создает или удаляет подписку и ставит задачу обработчику лент.
+
+    Задача ставится только при изменении подписки, в той же транзакции;
+    там же меняется время изменения подписок пользователя, от которого
+    зависят валидаторы страниц с кнопками подписки.
+    """
+    if action in (TimelineTask.FOLLOW_AUTHOR, TimelineTask.FOLLOW_GROUP):
+        _, changed = model.objects.get_or_create(**lookup)
+    else:
+        changed, _ = model.objects.filter(**lookup).delete()
+    if changed:
+        TimelineTask.objects.create(action=action, **lookup)
+        FeedVersion.touch([follows_tag(lookup['user'].pk)])
+
+
+# Подписка меняет время изменения подписок пользователя: еще два запроса
+# (обновление и добавление тега)
+@query_budget(6)
+@require_POST
+@login_required
+@serialize_writes
+def profile_follow(request, username):
+    """Подписка на автора."""
+    author = get_object_or_404(User, username=username)
+    if author.pk != request.user.pk:
+        change_follow(
+            Follow, TimelineTask.FOLLOW_AUTHOR,
+            user=request.user, author=author,
+        )
+    return redirect('posts:profile', username=username)
+
+
+# Отписка меняет время изменения подписок пользователя: еще до двух
+# запросов (обновление и добавление тега)
+@query_budget(5)
+@require_POST
+@login_required
+@serialize_writes
+def profile_unfollow(request, username):
+    """Отписка от автора."""
+    author = get_object_or_404(User, username=username)
+    change_follow(
+        Follow, TimelineTask.UNFOLLOW_AUTHOR,
+        user=request.user, author=author,
+    )
+    return redirect('posts:profile', username=username)
+
+
+# Подписка меняет время изменения подписок пользователя: еще два запроса
+# (обновление и добавление тега)
+@query_budget(6)
+@require_POST
+@login_required
+@serialize_writes
+def group_follow(request, slug):
+    """Подписка на группу."""
+    group = get_object_or_404(Group, slug=slug)
+    change_follow(
+        GroupFollow, TimelineTask.FOLLOW_GROUP,
+        user=request.user, group=group,
+    )
+    return redirect('posts:group_list', slug=slug)
+
+
+# Отписка меняет время изменения подписок пользователя: еще до двух
+# запросов (обновление и добавление тега)
+@query_budget(5)
+@require_POST
+@login_required
+@serialize_writes
+def group_unfollow(request, slug):
+    """Отписка от группы."""
+    group = get_object_or_404(Group, slug=slug)
+    change_follow(
+        GroupFollow, TimelineTask.UNFOLLOW_GROUP,
+        user=request.user, group=group,
+    )
+    return redirect('posts:group_list', slug=slug)
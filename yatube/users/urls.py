@@ -13,6 +13,7 @@ app_name = 'users'
 
 urlpatterns = [
     path('signup/', views.SignUp.as_view(), name='signup'),
+    path('menu/', views.UserMenu.as_view(), name='menu'),
     path(
         'login/',
         LoginView.as_view(template_name='users/login.html'),
@@ -1,5 +1,7 @@
 from django.urls import reverse_lazy
-from django.views.generic import CreateView
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.generic import CreateView, TemplateView
 
 from .forms import CreationForm
 
@@ -8,3 +10,16 @@ class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+
+@method_decorator(
+    cache_control(private=True, no_cache=True, no_store=True, max_age=0),
+    name='dispatch',
+)
+class UserMenu(TemplateView):
+    """Персональная часть меню отдельным ответом.
+
+    Для edge-side includes и клиентских вставок: страница кешируется
+    целиком, а меню запрашивается отдельно и никогда не кешируется.
+    """
+    template_name = 'includes/user_menu.html'
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 
 import os
 from pathlib import Path
+from typing import Optional
 
 from typing_extensions import Final
 
@@ -52,11 +53,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryOriginMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.NPlusOneMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'posts.middleware.FeedPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -94,6 +102,83 @@ DATABASES = {
     },
 }
 
+DATABASE_ROUTERS = [
+    'core.routers.ReplicaRouter',
+]
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+# Кеш общий для всех рабочих процессов и timeline_worker: сброс тегов
+# виден всем. В кеше только копии данных базы, без incr, поэтому
+# одновременная запись из разных процессов их не портит. При нескольких
+# серверах вместо файлов нужен общий memcached
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.FileCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 20_000,
+            'CULL_INTERVAL': 60,
+        },
+    },
+}
+
+TEST_RUNNER = 'core.testing.IsolatedTestRunner'
+
+
+# Logging
+# https://docs.djangoproject.com/en/2.2/topics/logging/
+
+# Строки JSON core.timing и core.slow_queries пишутся как есть, чтобы
+# их разбирал сборщик логов; предупреждения о бюджетах запросов и N+1 —
+# с уровнем и источником
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            'format': '%(message)s',
+        },
+        'verbose': {
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+    },
+    'handlers': {
+        'json': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['json'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'core.slow_queries': {
+            'handlers': ['json'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'posts.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -143,6 +228,67 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Блок констант
 POSTS_COUNT: Final[int] = 10
+# Режим пагинации лент: 'offset' (?page=N), 'keyset' (?cursor=...),
+# 'countless' (?page=N без COUNT(*)) или 'cached' (COUNT(*) из кеша)
+POSTS_PAGINATION: Final[str] = 'offset'
+POSTS_COUNT_CACHE_TIMEOUT: Final[int] = 60 * 60
+# Время жизни отрисованных страниц лент; при отладке кеш отключен
+FEED_CACHE_TIMEOUT: Final[int] = 0 if DEBUG else 60 * 10
+# Время жизни целых страниц лент (персональные фрагменты не кешируются)
+PAGE_CACHE_TIMEOUT: Final[int] = 0 if DEBUG else 60 * 10
+# Сколько первых страниц ленты кешируется; страницы с другими
+# параметрами запроса не кешируются, чтобы число записей было ограничено
+FEED_CACHE_PAGES: Final[int] = 10
+# Сколько записей админка считает точно; больше — выводится как оценка
+ADMIN_COUNT_LIMIT: Final[int] = 10_000
+# Превышение бюджета запросов view-функцией: исключение вместо записи в лог
+QUERY_BUDGET_STRICT: Final[bool] = False
+# Доля запросов, проверяемых на N+1; при отладке проверяются все
+NPLUSONE_SAMPLE_RATE: Final[float] = 1.0 if DEBUG else 0.01
+# Сколько одинаковых запросов из одного места считать N+1
+NPLUSONE_THRESHOLD: Final[int] = 3
+NPLUSONE_RAISE: Final[bool] = False
+# Общий для всех рабочих процессов файл с гистограммами запросов
+METRICS_DB: Final[str] = os.path.join(BASE_DIR, 'metrics.sqlite3')
+# Как часто процесс дописывает накопленные наблюдения в METRICS_DB, с
+METRICS_FLUSH_INTERVAL: Final[int] = 5
+# Токен сборщика метрик (Authorization: Bearer ...); без него эндпоинт
+# метрик доступен только сотрудникам
+METRICS_TOKEN: Final[Optional[str]] = os.environ.get('METRICS_TOKEN')
+# Каталог профилей запросов (?profile=cprofile|sample для сотрудников)
+PROFILER_DIR: Final[str] = os.path.join(BASE_DIR, 'profiles')
+# Период выборочного профилировщика, с
+PROFILER_SAMPLE_INTERVAL: Final[float] = 0.001
+# Запросы к базе дольше этого времени (мс) попадают в журнал медленных
+SLOW_QUERY_MS: Final[float] = 100
+# Как часто для одной формы запроса снимается EXPLAIN и пишется лог, с
+SLOW_QUERY_RATE_LIMIT: Final[int] = 60
+# PRAGMA для каждого нового соединения с SQLite: WAL не блокирует
+# читателей записью, synchronous=NORMAL в WAL не теряет целостность
+SQLITE_PRAGMAS: Final[dict] = {
+    'busy_timeout': 5000,
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64_000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+# Повторы транзакции записи при "database is locked" и первая пауза, с
+SQLITE_WRITE_RETRIES: Final[int] = 3
+SQLITE_RETRY_DELAY: Final[float] = 0.05
+# Псевдонимы DATABASES с репликами для чтения; пусто — все из 'default'
+DATABASE_REPLICAS: Final[list] = []
+# Сколько секунд после записи посетитель читает из основной базы
+REPLICA_STICKY_SECONDS: Final[int] = 5
+# Сколько последних постов хранит лента подписок (TimelineEntry)
+TIMELINE_LENGTH: Final[int] = 1000
+# Посты авторов, у которых столько постов, не рассылаются по лентам,
+# а читаются при открытии ленты
+TIMELINE_PROLIFIC_POSTS: Final[int] = 1000
+TIMELINE_PULLED_CACHE_TIMEOUT: Final[int] = 60
+# Сколько лент обновляет одна транзакция рассылки поста
+TIMELINE_FANOUT_BATCH: Final[int] = 1000
+# Пауза timeline_worker, когда задач нет, с
+TIMELINE_WORKER_INTERVAL: Final[float] = 1
 POSTS_TEST_COUNT: Final[int] = 3
 FIRST_CHARACTERS: Final[int] = 15
 